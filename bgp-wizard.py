@@ -13,7 +13,10 @@ based on node naming conventions and known topology roles (CRR, CCR, CHR, DHR, D
 
 The script establishes SSH connections to all routers via Scrapli, discovers their Loopback0 IP
 addresses (used as BGP Router-IDs), builds the BGP relationship hierarchy, and optionally pushes
-fully-rendered BGP configurations back to the routers.
+fully-rendered BGP configurations back to the routers. Device I/O runs concurrently on asyncio
+(up to MAX_CONCURRENCY sessions at a time, set by `CLAB_TOOLS_WORKERS`, see `clab_common.py`),
+so a run takes roughly as long as the slowest router.
+Each router is reached over one pooled SSH session shared by the Loopback0 read and the push.
 
 Features
 --------
@@ -31,6 +34,8 @@ Features
 - Optional inclusion or exclusion of CE routers from analysis
 - Dry-run export of planned configurations to `./bgp-wizard_configs`
 - Optional live deployment (push to routers)
+- `containerlab inspect` output shared with the other clab-tools through the cache in
+  `clab_common.py` (`--no-cache` bypasses it)
 
 Configuration Template Highlights
 ---------------------------------
@@ -50,6 +55,8 @@ Example Usage
 
 2. Run the wizard:
    $ ./bgp-wizard.py
+   $ ./bgp-wizard.py --no-cache   # force a fresh `containerlab inspect`
+   $ ./bgp-wizard.py --push-concurrency 4   # fewer simultaneous commits on a small host
 
 3. During execution, you will be prompted to:
    - Decide whether CE routers should be analyzed.
@@ -62,8 +69,10 @@ Example Usage
 Dependencies
 ------------
 - Python 3.10+
-- Scrapli (network automation SSH library)
+- Scrapli (network automation SSH library), AsyncIOSXRDriver on the asyncssh transport
+- orjson (optional, faster parsing of `containerlab inspect` output)
 - Containerlab CLI (`containerlab inspect --format json`)
+- `clab_common.py` (part of clab-tools) in the same directory
 
 Author
 ------
@@ -73,20 +82,34 @@ Date: 2025-10-16
 """
 
 from __future__ import annotations
-import json
+import argparse
+import asyncio
 import re
 import sys
-import time
-import threading
-import subprocess
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from itertools import chain, permutations, product
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple
 
 from scrapli import Scrapli
+from scrapli.driver.core import AsyncIOSXRDriver
+
+from clab_common import MAX_WORKERS, run_containerlab_inspect
 
 DEFAULT_AS = 65000
 BGP_PASSWORD = "hurz123"
 DEFAULT_LOOPBACK0_NET = "1.1.1.0/24"
+MAX_CONCURRENCY = MAX_WORKERS  # parallel SSH sessions towards the lab (CLAB_TOOLS_WORKERS)
+PUSH_CONCURRENCY = min(8, MAX_CONCURRENCY)  # parallel commits; XRd commits are CPU-heavy on a shared lab host
+
+# Read-only commands sent to every router by get_device_facts()
+LOOPBACK0_CMD = "show ipv4 interface Loopback0 brief"
+FACT_COMMANDS = (LOOPBACK0_CMD,)
+# "Loopback0   1.1.1.1   Up   Up   default" (an unset address reads "unassigned" and won't match)
+_LO0_BRIEF_RE = re.compile(r"(?m)^Loopback0\s+(\d+\.\d+\.\d+\.\d+)")
 
 # ---------------- Pretty bits ----------------
 def banner():
@@ -96,144 +119,121 @@ def banner():
 This tool builds hierarchical iBGP for Cisco XRd in Containerlab.
 """)
 
-class Spinner:
-    def __init__(self, msg="Analyzing topology"):
-        self.msg = msg
-        self._stop = threading.Event()
-        self._t = None
-
-    def start(self):
-        def run():
-            sys.stdout.write(self.msg + " ")
-            sys.stdout.flush()
-            while not self._stop.is_set():
-                for ch in "|/-\\":
-                    sys.stdout.write("\b" + ch)
-                    sys.stdout.flush()
-                    time.sleep(0.1)
-                    if self._stop.is_set():
-                        break
-            sys.stdout.write("\b Done!\n")
-        self._t = threading.Thread(target=run, daemon=True)
-        self._t.start()
-
-    def stop(self):
-        self._stop.set()
-        if self._t:
-            self._t.join()
-
 # ---------------- Containerlab ----------------
-def run_containerlab_inspect() -> dict:
-    proc = subprocess.run(
-        ["containerlab", "inspect", "-f", "json"],
-        capture_output=True,
-        text=True,
-        check=True,
+def node_name_pattern(lab_name: str) -> re.Pattern:
+    """One match per raw node name: `short` drops the clab-<lab>- prefix, `prefix` feeds classify_router."""
+    return re.compile(
+        rf"(?:clab-{re.escape(lab_name)}-)?(?P<short>(?P<prefix>[A-Za-z]{{0,3}}).*)",
+        re.DOTALL,
     )
-    return json.loads(proc.stdout)
-
-def short_name(raw_name: str, lab_name: str) -> str:
-    p = f"clab-{lab_name}-"
-    return raw_name[len(p):] if raw_name.startswith(p) else raw_name
 
 # ---------------- Roles ----------------
+_ROLE_3 = {r: r for r in ("crr", "ccr", "chr", "sar", "dhr", "dsr", "ahr", "asr")}
+_ROLE_2 = {"ce": "ce"}
+# generic fallbacks (rare)
+_ROLE_1 = {"c": "core", "s": "core", "d": "distribution", "a": "distribution"}
+
+@lru_cache(maxsize=64)
 def classify_router(name: str) -> str:
     p = name.lower()
-    if p.startswith("ce"):
-        return "ce"
-    if p.startswith("crr"):
-        return "crr"
-    if p.startswith("ccr"):
-        return "ccr"
-    if p.startswith("chr"):
-        return "chr"
-    if p.startswith("sar"):
-        return "sar"
-    if p.startswith("dhr"):
-        return "dhr"
-    if p.startswith("dsr"):
-        return "dsr"
-    if p.startswith("ahr"):
-        return "ahr"
-    if p.startswith("asr"):
-        return "asr"
-    # generic fallbacks (rare)
-    if p.startswith("c") or p.startswith("s"):
-        return "core"
-    if p.startswith("d") or p.startswith("a"):
-        return "distribution"
-    return "other"
+    return _ROLE_3.get(p[:3]) or _ROLE_2.get(p[:2]) or _ROLE_1.get(p[:1], "other")
 
 # ---------------- Device ops ----------------
-def get_loopback0_ip(host: str, username="clab", password="clab@123") -> Optional[str]:
-    conn = Scrapli(
+def xr_connection(host: str, username="clab", password="clab@123") -> AsyncIOSXRDriver:
+    return AsyncIOSXRDriver(
         host=host,
         auth_username=username,
         auth_password=password,
-        platform="cisco_iosxr",
+        transport="asyncssh",
         auth_strict_key=False,
         timeout_socket=45,
         timeout_transport=45,
         timeout_ops=90,
     )
-    conn.open()
-    resp = conn.send_command("show running-config interface Loopback0", strip_prompt=False)
-    conn.close()
-    txt = resp.result or ""
-    for line in txt.splitlines():
-        m = re.search(r"ipv4 address (\d+\.\d+\.\d+\.\d+)", line)
-        if m:
-            return m.group(1)
-    return None
-
 
-def push_config(host: str, lines: list[str]):
-    """
-    Push BGP config to Cisco XR router using the same reliable workflow as ospf-wizard.py.
-    - Opens connection
-    - Sends all configuration lines
-    - Commits configuration (in config mode)
-    - Closes connection cleanly
-    """
-
-    print(f"📡 Pushing to {host} ...")
-
-    conn = Scrapli(
-        host=host,
-        auth_username="clab",
-        auth_password="clab@123",
-        platform="cisco_iosxr",
-        auth_strict_key=False,
-    )
 
+async def close_quietly(conn: AsyncIOSXRDriver):
     try:
-        conn.open()
-
-        # --- Send configuration ---
-        conn.send_configs(lines)
+        await conn.close()
+    except Exception:
+        try:
+            conn.transport.close()
+        except Exception:
+            pass
 
-        # --- Commit while still in config mode ---
-        commit_result = conn.send_config("commit")
-        if "Uncommitted" in commit_result.result or "error" in commit_result.result.lower():
-            print(f"⚠️ Commit warning on {host}:\n{commit_result.result.strip()}")
-        else:
-            print(f"✅ Commit complete on {host}")
 
-        # Optional cleanup: exit to exec mode (not strictly needed)
-        conn.send_config("end")
+class SSHPool:
+    """
+    One open XR session per (host, username), shared by the Loopback0 read and
+    the later config push. A dropped session is reopened on next use; all
+    sessions are closed by close_all() at the end of the run.
+    """
 
-    except Exception as e:
-        print(f"❌ Failed on {host}: {e}")
+    def __init__(self):
+        self._conns: Dict[Tuple[str, str], AsyncIOSXRDriver] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def session(self, host: str, username="clab", password="clab@123"):
+        """Borrow the host's session; the per-host lock keeps callers from interleaving on it."""
+        key = (host, username)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            conn = self._conns.get(key)
+            if conn is None or not conn.isalive():
+                conn = xr_connection(host, username, password)
+                await conn.open()
+                self._conns[key] = conn
+            yield conn
+
+    async def close_all(self):
+        conns = list(self._conns.values())
+        self._conns.clear()
+        await asyncio.gather(*(close_quietly(c) for c in conns))
+
+
+async def get_device_facts(conn: AsyncIOSXRDriver) -> dict:
+    """Collect read-only facts over an open session; add commands to FACT_COMMANDS as needed."""
+    cmds = list(FACT_COMMANDS)
+    resp = await conn.send_commands(cmds)
+    out = dict(zip(cmds, (r.result or "" for r in resp)))
+    m = _LO0_BRIEF_RE.search(out[LOOPBACK0_CMD])
+    return {"loopback": m.group(1) if m else None}
+
+
+def _report_commit(host: str, responses) -> bool:
+    """Print rejected lines and commit warnings; True only if everything was accepted."""
+    if responses.failed:
+        # stop_on_failed: the session ended at the first rejected line, the commit never ran
+        print(f"⚠️ Some lines were rejected on {host}, nothing committed:")
+        for r in responses:
+            if r.failed:
+                print(f"   {r.channel_input}: {r.result.strip()}")
+        return False
+    commit_result = responses[-1]
+    if "Uncommitted" in commit_result.result or "error" in commit_result.result.lower():
+        print(f"⚠️ Commit warning on {host}:\n{commit_result.result.strip()}")
+        return False
+    print(f"✅ Commit complete on {host}")
+    return True
+
+
+async def push_config(conn: AsyncIOSXRDriver, host: str, config: str) -> bool:
+    """
+    Push BGP config to Cisco XR router using the same reliable workflow as ospf-wizard.py.
+    - Uses the already open (pooled) session; opening/closing is the caller's job
+    - Sends the rendered configuration line by line and stops at the first rejected line
+    - Commits configuration (in config mode) only if every line was accepted
+    Returns True if no line was rejected and the commit went through cleanly.
+    """
 
-    finally:
-        # --- Ensure clean close ---
-        try:
-            conn.close()
-        except Exception:
-            try:
-                conn.transport.close()
-            except Exception:
-                pass
+    # --- Send configuration and commit in one go (commit runs while still in config mode) ---
+    # stop_on_failed: a rejected line ends the session before the commit
+    responses = await conn.send_configs(
+        config.split("\n") + ["commit"],
+        stop_on_failed=True,
+        privilege_level="configuration",
+    )
+    return _report_commit(host, responses)
 
 
 def push_config_bak2(host: str, lines: list[str]):
@@ -277,6 +277,29 @@ def push_config_bak(host: str, lines: List[str], username="clab", password="clab
     conn.close()
 
 # ---------------- Plan builder ----------------
+# Route-reflector tiers: RR role -> roles of its clients
+RR_TIERS = (
+    ("crr", ("ccr", "chr", "sar")),  # 2️⃣ CRR → CCR/CHR/SAR
+    ("chr", ("dhr", "dsr", "ahr")),  # 3️⃣ CHR → DHR/DSR/AHR
+    ("ahr", ("asr",)),               # 4️⃣ AHR → ASR
+)
+
+def _add_neighbor(entry: dict, peer: dict, group: str):
+    """Append peer to a plan entry unless the same (peer, group) is already there."""
+    key = (peer["loopback"], group)
+    if key in entry["_seen"]:
+        return
+    entry["_seen"].add(key)
+    entry["neighbors"].append({
+        "peer": peer["loopback"],
+        "peer_name": peer["name"],
+        "peer_role": peer["role"],
+        "group": group,
+    })
+    if group == "Client-to-RR":
+        entry["_upstream"].add(peer["role"])
+
+
 def build_bgp_plan(nodes_info: List[dict], asn: int) -> dict:
     """
     Build plan strictly per hierarchy (not link-limited):
@@ -286,76 +309,38 @@ def build_bgp_plan(nodes_info: List[dict], asn: int) -> dict:
       ahr -> asr (RR-to-Client)
     """
     plan: Dict[str, dict] = {}
-    role_map: Dict[str, List[dict]] = {}
+    role_map: Dict[str, List[dict]] = defaultdict(list)
     for n in nodes_info:
-        role_map.setdefault(n["role"], []).append(n)
+        role_map[n["role"]].append(n)
 
-    # Initialize plan skeleton
+    # Initialize plan skeleton. Bookkeeping filled on insert, dropped before returning:
+    # _seen = (peer, group) keys for dedupe, _upstream = roles of this node's RRs
     for n in nodes_info:
         plan[n["name"]] = {
             "node": n,
             "asn": asn,
             "router_id": n["loopback"],
             "neighbors": [],
+            "_seen": set(),
+            "_upstream": set(),
         }
 
-    def add_pair(a: dict, b: dict, group_a_to_b: str, group_b_to_a: str):
-        """Add bidirectional neighbor relationship."""
-        if a["name"] != b["name"]:
-            plan[a["name"]]["neighbors"].append({
-                "peer": b["loopback"],
-                "peer_name": b["name"],
-                "peer_role": b["role"],
-                "group": group_a_to_b,
-            })
-            plan[b["name"]]["neighbors"].append({
-                "peer": a["loopback"],
-                "peer_name": a["name"],
-                "peer_role": a["role"],
-                "group": group_b_to_a,
-            })
-
     # 1️⃣ CRR full-mesh
-    for a in role_map.get("crr", []):
-        for b in role_map.get("crr", []):
-            if a["name"] != b["name"]:
-                plan[a["name"]]["neighbors"].append({
-                    "peer": b["loopback"],
-                    "peer_name": b["name"],
-                    "peer_role": "crr",
-                    "group": "RR-Mesh",
-                })
+    for a, b in permutations(role_map["crr"], 2):
+        _add_neighbor(plan[a["name"]], b, "RR-Mesh")
 
-    # 2️⃣ CRR → CCR/CHR/SAR
-    for rr in role_map.get("crr", []):
-        for cl in role_map.get("ccr", []) + role_map.get("chr", []) + role_map.get("sar", []):
-            add_pair(rr, cl, "RR-to-Client", "Client-to-RR")
-
-    # 3️⃣ CHR → DHR/DSR/AHR
-    for rr in role_map.get("chr", []):
-        for cl in role_map.get("dhr", []) + role_map.get("dsr", []) + role_map.get("ahr", []):
-            add_pair(rr, cl, "RR-to-Client", "Client-to-RR")
-
-    # 4️⃣ AHR → ASR
-    for rr in role_map.get("ahr", []):
-        for cl in role_map.get("asr", []):
-            add_pair(rr, cl, "RR-to-Client", "Client-to-RR")
+    # 2️⃣-4️⃣ RR tiers, bidirectional (client list indexed once per tier, not per RR).
+    # RR and client roles never overlap within a tier, so no self-pair check is needed.
+    for rr_role, client_roles in RR_TIERS:
+        clients = [cl for r in client_roles for cl in role_map[r]]
+        for rr, cl in product(role_map[rr_role], clients):
+            _add_neighbor(plan[rr["name"]], cl, "RR-to-Client")
+            _add_neighbor(plan[cl["name"]], rr, "Client-to-RR")
 
     # ❌ CCR and CHR must *not* peer directly
     # ❌ CCR and SAR must *not* peer directly
     # So we skip any such relationships completely
 
-    # Deduplicate neighbors
-    for p in plan.values():
-        seen = set()
-        uniq = []
-        for nb in p["neighbors"]:
-            key = (nb["peer"], nb["group"])
-            if key not in seen:
-                seen.add(key)
-                uniq.append(nb)
-        p["neighbors"] = uniq
-
     # Validation warnings (expected upstream)
     expectations = {
         "dhr": "chr",
@@ -370,11 +355,12 @@ def build_bgp_plan(nodes_info: List[dict], asn: int) -> dict:
         role = n["role"]
         if role in expectations:
             expect = expectations[role]
-            nbs = plan[n["name"]]["neighbors"]
-            has_up = any(nb["peer_role"] == expect and nb["group"] == "Client-to-RR" for nb in nbs)
-            if not has_up:
+            if expect not in plan[n["name"]]["_upstream"]:
                 print(f"⚠️  Warning: {n['name']} ({role}) has no upstream {expect.upper()} peer in plan!")
 
+    for p in plan.values():
+        del p["_seen"], p["_upstream"]
+
     return plan
 
 
@@ -594,6 +580,140 @@ def build_bgp_plan_bak(nodes_info: List[dict], asn: int) -> dict:
     return plan
 
 # ---------------- Config generation ----------------
+_BGP_HEADER = """\
+router bgp {asn}
+ nsr
+ timers bgp 30 90
+ bgp router-id {rid}
+ bgp graceful-restart restart-time 120
+ bgp graceful-restart graceful-reset
+ bgp graceful-restart stalepath-time 360
+ bgp graceful-restart
+ bgp log neighbor changes detail
+ ibgp policy out enforce-modifications
+ !
+ address-family ipv4 unicast
+  network {rid}/32
+  allocate-label route-policy RP_BGPLU_Lo0
+ !
+ address-family vpnv4 unicast
+  nexthop trigger-delay critical 0
+ !
+ address-family vpnv6 unicast
+  nexthop trigger-delay critical 0
+ !
+!"""
+
+
+# Route-policy allocating BGP-LU labels for all Loopback0s (same on every router)
+_RP_BGPLU_LO0 = (
+    "!",
+    "route-policy RP_BGPLU_Lo0",
+    #f"  if destination in ({rid}/32) then",
+    f"  if destination in ({DEFAULT_LOOPBACK0_NET} ge 32 le 32) then",
+    "    pass",
+    "  else",
+    "    drop",
+    "  endif",
+    "end-policy",
+    "!",
+)
+
+
+def _neighbor_group_block(name, desc, rrclient=False, nhself=False) -> str:
+    """Render one neighbor-group stanza; only `{asn}` is left to fill in per router."""
+    password = BGP_PASSWORD.replace("{", "{{").replace("}", "}}")
+    lines = [
+        f" neighbor-group {name}",
+        "  remote-as {asn}",
+        f"  password clear {password}",
+        "  update-source Loopback0",
+        f"  description {desc}",
+        "  !",
+        "  address-family ipv4 labeled-unicast",
+    ]
+    if rrclient:
+        lines.append("   route-reflector-client")
+    if nhself:
+        lines.append("   next-hop-self")
+    for af in ("vpnv4", "vpnv6"):
+        lines.append("  !")
+        lines.append(f"  address-family {af} unicast")
+        if rrclient:
+            lines.append("   multipath")
+            lines.append("   route-reflector-client")
+        if nhself:
+            lines.append("   next-hop-self")
+    lines.append("  !")
+    lines.append(" !")
+    return "\n".join(lines)
+
+
+# Neighbor-groups per role: (name, description, route-reflector-client, next-hop-self)
+_ROLE_GROUPS = {
+    "crr": (
+        ("CRR-to-CRR", "Group for full mesh peering between all CRR routers", False, False),
+        ("CRR-to-C-Clients", "Group for downstream peering to all RR Clients in Core", True, True),
+    ),
+    "ccr": (
+        ("CCR_SAR-to-CRR", "Group for upstream peering from CCR and SAR to all CRR Route-Reflectors", False, True),
+    ),
+    "chr": (
+        ("CHR-to-D-Clients", "Group for downstream peering to all RR Clients in Distribution", True, True),
+        ("CHR-to-CRR", "Group for upstream peering from CHR to all CRR Route-Reflectors", False, True),
+    ),
+    "dhr": (
+        ("DHR_DSR-to-CHR", "Group for upstream peering from DHR and DSR to all CHR Route-Reflectors", False, True),
+    ),
+    "ahr": (
+        ("AHR-to-A-Clients", "Group for downstream peering to all RR Clients in Access", True, True),
+        ("AHR-to-CHR", "Group for upstream peering from AHR to all CHR Route-Reflectors", False, True),
+    ),
+    "asr": (
+        ("ASR-to-AHR", "Group for upstream peering from ASR to all AHR Route-Reflectors", False, True),
+    ),
+}
+_ROLE_GROUPS["sar"] = _ROLE_GROUPS["ccr"]
+_ROLE_GROUPS["dsr"] = _ROLE_GROUPS["dhr"]
+
+def _group_for(local: str, peer_role: str, rel_group: str) -> str:
+    if local == "crr":
+        return "CRR-to-CRR" if peer_role == "crr" else "CRR-to-C-Clients"
+    if local in ("ccr", "sar"):
+        return "CCR_SAR-to-CRR"
+    if local == "chr":
+        return "CHR-to-D-Clients" if rel_group == "RR-to-Client" else "CHR-to-CRR"
+    if local in ("dhr", "dsr"):
+        return "DHR_DSR-to-CHR"
+    if local == "ahr":
+        return "AHR-to-A-Clients" if peer_role == "asr" else "AHR-to-CHR"
+    if local == "asr":
+        return "ASR-to-AHR"
+    return "UNKNOWN"
+
+
+# (local role, peer role, plan relation) -> neighbor-group, for every role classify_router can return
+_ALL_ROLES = (*_ROLE_3.values(), *_ROLE_2.values(), *dict.fromkeys(_ROLE_1.values()), "other")
+_GROUP_TABLE = {
+    key: _group_for(*key)
+    for key in product(_ALL_ROLES, _ALL_ROLES, ("RR-Mesh", "RR-to-Client", "Client-to-RR"))
+}
+
+_ROLE_GROUP_BLOCKS = {
+    role: "\n".join(_neighbor_group_block(*g) for g in groups)
+    for role, groups in _ROLE_GROUPS.items()
+}
+
+@lru_cache(maxsize=None)
+def _template_for(role: str, asn: int) -> str:
+    """Header and role neighbor-groups joined once per (role, asn); only `{rid}` is left to fill."""
+    parts = [_BGP_HEADER.format(asn=asn, rid="{rid}")]
+    block = _ROLE_GROUP_BLOCKS.get(role)
+    if block:
+        parts.append(block.format(asn=asn))
+    return "\n".join(parts)
+
+
 def generate_config_lines(entry: dict) -> List[str]:
     node = entry["node"]
     role = node["role"]
@@ -601,163 +721,72 @@ def generate_config_lines(entry: dict) -> List[str]:
     asn = entry["asn"]
     nbs = entry["neighbors"]
 
-    # --- Base BGP config identical on all routers ---
-    lines = [
-        f"router bgp {asn}",
-        " nsr",
-        " timers bgp 30 90",
-        f" bgp router-id {rid}",
-        " bgp graceful-restart restart-time 120",
-        " bgp graceful-restart graceful-reset",
-        " bgp graceful-restart stalepath-time 360",
-        " bgp graceful-restart",
-        " bgp log neighbor changes detail",
-        " ibgp policy out enforce-modifications",
-        " !",
-        " address-family ipv4 unicast",
-        f"  network {rid}/32",
-        "  allocate-label route-policy RP_BGPLU_Lo0",
-        " !",
-        " address-family vpnv4 unicast",
-        "  nexthop trigger-delay critical 0",
-        " !",
-        " address-family vpnv6 unicast",
-        "  nexthop trigger-delay critical 0",
-        " !",
-        "!"
-    ]
-
-    # --- Neighbor-group generator helper ---
-    def add_group(name, desc, rrclient=False, nhself=False):
-        nonlocal lines
-        lines.extend([
-            f" neighbor-group {name}",
-            f"  remote-as {asn}",
-            f"  password clear {BGP_PASSWORD}",
-            "  update-source Loopback0",
-            f"  description {desc}",
-            "  !",
-            "  address-family ipv4 labeled-unicast",
-        ])
-        if rrclient:
-            lines.append("   route-reflector-client")
-        if nhself:
-            lines.append("   next-hop-self")
-        lines += ["  !", "  address-family vpnv4 unicast"]
-        if rrclient:
-            lines += ["   multipath", "   route-reflector-client"]
-        if nhself:
-            lines.append("   next-hop-self")
-        lines += ["  !", "  address-family vpnv6 unicast"]
-        if rrclient:
-            lines += ["   multipath", "   route-reflector-client"]
-        if nhself:
-            lines.append("   next-hop-self")
-        lines += ["  !", " !"]
-
-    # --- Neighbor-group sets per role ---
-    if role == "crr":
-        add_group("CRR-to-CRR", "Group for full mesh peering between all CRR routers")
-        add_group(
-            "CRR-to-C-Clients",
-            "Group for downstream peering to all RR Clients in Core",
-            rrclient=True,
-            nhself=True,
-        )
-    elif role in ("ccr", "sar"):
-        add_group(
-            "CCR_SAR-to-CRR",
-            "Group for upstream peering from CCR and SAR to all CRR Route-Reflectors",
-            nhself=True,
-        )
-    elif role == "chr":
-        add_group(
-            "CHR-to-D-Clients",
-            "Group for downstream peering to all RR Clients in Distribution",
-            rrclient=True,
-            nhself=True,
-        )
-        add_group(
-            "CHR-to-CRR",
-            "Group for upstream peering from CHR to all CRR Route-Reflectors",
-            nhself=True,
-        )
-    elif role in ("dhr", "dsr"):
-        add_group(
-            "DHR_DSR-to-CHR",
-            "Group for upstream peering from DHR and DSR to all CHR Route-Reflectors",
-            nhself=True,
-        )
-    elif role == "ahr":
-        add_group(
-            "AHR-to-A-Clients",
-            "Group for downstream peering to all RR Clients in Access",
-            rrclient=True,
-            nhself=True,
-        )
-        add_group(
-            "AHR-to-CHR",
-            "Group for upstream peering from AHR to all CHR Route-Reflectors",
-            nhself=True,
-        )
-    elif role == "asr":
-        add_group(
-            "ASR-to-AHR",
-            "Group for upstream peering from ASR to all AHR Route-Reflectors",
-            nhself=True,
-        )
+    # --- Base BGP config + neighbor-group sets for this role (cached per role/AS) ---
+    lines = _template_for(role, asn).replace("{rid}", rid).split("\n")
 
     # --- Neighbor assignments ---
-    def group_for(local: str, peer_role: str, rel_group: str) -> str:
-        if local == "crr":
-            return "CRR-to-CRR" if peer_role == "crr" else "CRR-to-C-Clients"
-        if local in ("ccr", "sar"):
-            return "CCR_SAR-to-CRR"
-        if local == "chr":
-            return "CHR-to-D-Clients" if rel_group == "RR-to-Client" else "CHR-to-CRR"
-        if local in ("dhr", "dsr"):
-            return "DHR_DSR-to-CHR"
-        if local == "ahr":
-            return "AHR-to-A-Clients" if peer_role == "asr" else "AHR-to-CHR"
-        if local == "asr":
-            return "ASR-to-AHR"
-        return "UNKNOWN"
-
-    for nb in nbs:
-        nb_ip = nb["peer"]
-        nb_name = nb["peer_name"]
-        nb_role = nb["peer_role"]
-        rel = nb["group"]
-        grp = group_for(role, nb_role, rel)
-        lines += [
-            f" neighbor {nb_ip}",
-            f"  use neighbor-group {grp}",
-            f"  description To {nb_name} with Loopback0 {nb_ip}",
+    lines.extend(chain.from_iterable(
+        (
+            f" neighbor {nb['peer']}",
+            f"  use neighbor-group {_GROUP_TABLE[role, nb['peer_role'], nb['group']]}",
+            f"  description To {nb['peer_name']} with Loopback0 {nb['peer']}",
             " !",
-        ]
+        )
+        for nb in nbs
+    ))
 
     # --- Route-policy for this router’s own Loopback0 ---
-    lines.extend([
-        "!",
-        "route-policy RP_BGPLU_Lo0",
-        #f"  if destination in ({rid}/32) then",
-        f"  if destination in ({DEFAULT_LOOPBACK0_NET} ge 32 le 32) then",
-        "    pass",
-        "  else",
-        "    drop",
-        "  endif",
-        "end-policy",
-        "!"
-    ])
+    lines.extend(_RP_BGPLU_LO0)
 
     return lines
 
+
+def render_config(entry: dict) -> str:
+    """Full router config as one string; used for both the export and the push."""
+    return "\n".join(generate_config_lines(entry))
+
 # ---------------- Main ----------------
-def main():
+async def gather_bounded(coros, limit: int = MAX_CONCURRENCY, return_exceptions: bool = False) -> list:
+    """Run coroutines concurrently, never more than `limit` at a time."""
+    sem = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with sem:
+            return await coro
+
+    return await asyncio.gather(*(run(c) for c in coros), return_exceptions=return_exceptions)
+
+
+async def gather_with_progress(coros, label: str, limit: int = MAX_CONCURRENCY) -> list:
+    """gather_bounded() that keeps a live `label done/total` counter on one console line."""
+    coros = list(coros)
+    total = len(coros)
+    done = 0
+
+    def show(suffix=""):
+        sys.stdout.write(f"\r{label} {done}/{total}{suffix}")
+        sys.stdout.flush()
+
+    async def counted(coro):
+        nonlocal done
+        try:
+            return await coro
+        finally:
+            done += 1
+            show()
+
+    show()
+    try:
+        return await gather_bounded((counted(c) for c in coros), limit)
+    finally:
+        show(" Done!\n" if done == total else "\n")
+
+
+async def main(use_cache: bool = True, push_concurrency: int = PUSH_CONCURRENCY):
     banner()
 
-    data = run_containerlab_inspect()
-    lab = list(data.keys())[0]
+    data = run_containerlab_inspect(use_cache)
+    lab = next(iter(data))
 
     include_ce = input("Include CE routers in BGP plan? (y/N): ").strip().lower() == "y"
     as_str = input(f"Enter BGP AS [default {DEFAULT_AS}]: ").strip()
@@ -767,10 +796,12 @@ def main():
     nodes_raw = [n for n in data[lab] if n.get("kind") == "cisco_xrd"]
 
     # Build base node info (name/host/role), then fetch loopbacks
+    name_re = node_name_pattern(lab)
     nodes_info = []
     for n in nodes_raw:
-        nm = short_name(n["name"], lab)
-        role = classify_router(nm)
+        m = name_re.fullmatch(n["name"])
+        nm = m["short"]
+        role = classify_router(m["prefix"])
         if role == "ce" and not include_ce:
             continue
         host = n["ipv4_address"].split("/")[0]
@@ -780,52 +811,107 @@ def main():
         print("⚠️ No eligible XRd routers found.")
         return
 
-    # Pull Loopback0s
-    spin = Spinner("Collecting Loopback0 from routers")
-    spin.start()
-    for node in nodes_info:
-        node["loopback"] = get_loopback0_ip(node["host"])
-    spin.stop()
-
-    missing = [n for n in nodes_info if not n["loopback"]]
-    if missing:
-        print("\n❌ Missing Loopback0 on routers:")
-        for m in missing:
-            print(f" - {m['name']} ({m['host']})")
-        sys.exit(1)
-
-    # Build plan
-    plan = build_bgp_plan(nodes_info, asn)
-
-    # Summary
-    print("\n🔎 Planned BGP allocations:")
-    for name, entry in plan.items():
-        node = entry["node"]
-        print(f"- {name} ({node['host']}) role={node['role']} RID={entry['router_id']} AS={asn}")
-        if not entry["neighbors"]:
-            print("   (no BGP peers planned)")
-        else:
-            for nb in entry["neighbors"]:
-                print(f"   {nb['peer']} ({nb['peer_name']}) → group {nb['group']}")
-
-    # Dry-run export
-    if input("\nExport planned configs to ./bgp-wizard_configs? (y/N): ").strip().lower() == "y":
-        out = Path("bgp-wizard_configs")
-        out.mkdir(exist_ok=True)
-        for name, entry in plan.items():
-            cfg = "\n".join(generate_config_lines(entry))
-            (out / f"{name}.cfg").write_text(cfg)
-        print(f"✅ Exported to {out.resolve()}")
+    pool = SSHPool()
+    try:
+        # Pull Loopback0s
+        async def collect(node: dict) -> dict:
+            async with pool.session(node["host"]) as conn:
+                return await get_device_facts(conn)
 
-    # Optional push
-    if input("\nPush configs to devices now? (y/N): ").strip().lower() == "y":
+        facts = await gather_with_progress(
+            (collect(n) for n in nodes_info), "Collecting Loopback0 from routers"
+        )
+        for node, f in zip(nodes_info, facts):
+            node.update(f)
+
+        missing = [n for n in nodes_info if not n["loopback"]]
+        if missing:
+            print("\n❌ Missing Loopback0 on routers:")
+            for m in missing:
+                print(f" - {m['name']} ({m['host']})")
+            sys.exit(1)
+
+        # Build plan
+        plan = build_bgp_plan(nodes_info, asn)
+
+        # Summary
+        print("\n🔎 Planned BGP allocations:")
         for name, entry in plan.items():
-            print(f"\n📡 Pushing to {name} ({entry['node']['host']}) ...")
-            lines = generate_config_lines(entry)
-            push_config(entry["node"]["host"], lines)
-            print(f"✅ Applied {len(lines)} lines to {name}")
+            node = entry["node"]
+            print(f"- {name} ({node['host']}) role={node['role']} RID={entry['router_id']} AS={asn}")
+            if not entry["neighbors"]:
+                print("   (no BGP peers planned)")
+            else:
+                for nb in entry["neighbors"]:
+                    print(f"   {nb['peer']} ({nb['peer_name']}) → group {nb['group']}")
+
+        # Dry-run export
+        if input("\nExport planned configs to ./bgp-wizard_configs? (y/N): ").strip().lower() == "y":
+            out = Path("bgp-wizard_configs")
+            out.mkdir(exist_ok=True)
+
+            def export_one(item):
+                name, entry = item
+                # stream the lines straight into the file; no joined copy of the config
+                with (out / f"{name}.cfg").open("w") as f:
+                    print(*generate_config_lines(entry), sep="\n", end="", file=f)
+
+            with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(plan)))) as ex:
+                list(ex.map(export_one, plan.items()))
+            print(f"✅ Exported to {out.resolve()}")
+
+        # Optional push
+        if input("\nPush configs to devices now? (y/N): ").strip().lower() == "y":
+            async def push_one(name: str, entry: dict):
+                host = entry["node"]["host"]
+                print(f"\n📡 Pushing to {name} ({host}) ...")
+                cfg = render_config(entry)
+                try:
+                    async with pool.session(host) as conn:
+                        ok = await push_config(conn, host, cfg)
+                except Exception as e:
+                    print(f"❌ Failed on {host}: {e}")
+                    return
+                if not ok:
+                    print(f"❌ Config not fully applied on {name}, see the warnings above")
+                    return
+                n_lines = cfg.count("\n") + 1
+                print(f"✅ Applied {n_lines} lines to {name}")
+
+            # one failing router must not cancel the pushes still running elsewhere
+            results = await gather_bounded(
+                (push_one(name, entry) for name, entry in plan.items()),
+                limit=push_concurrency,
+                return_exceptions=True,
+            )
+            for name, res in zip(plan, results):
+                if isinstance(res, Exception):
+                    print(f"❌ Push to {name} failed: {res}")
+
+    finally:
+        await pool.close_all()
 
     print("\n✅ Done.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(
+        description="Hierarchical iBGP generator and deployer for Cisco XRd in Containerlab."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-run 'containerlab inspect' instead of reusing the cached result."
+    )
+    parser.add_argument(
+        "--push-concurrency",
+        type=int,
+        default=PUSH_CONCURRENCY,
+        metavar="N",
+        help=f"Routers configured in parallel during the push (default {PUSH_CONCURRENCY})."
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main(
+        use_cache=not args.no_cache,
+        push_concurrency=max(1, args.push_concurrency),
+    ))
\ No newline at end of file
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+clab_common.py
+==============
+
+Helpers shared by the clab-tools scripts.
+
+Overview
+--------
+This module is imported by the scripts, it is not run on its own. Keep it in
+the same directory as the scripts that use it.
+
+Inspect cache
+-------------
+`run_containerlab_inspect()` runs `containerlab inspect -f json` and caches
+the result in `~/.cache/clab-tools/inspect-<topology>.json`. A tool started
+within `INSPECT_CACHE_TTL` seconds reuses that result instead of running
+containerlab again, as long as the topology file (`$CLAB_LABFILE`, or the
+only `*.clab.yml` / `*.clab.yaml` in the current directory) is unchanged and
+the lab was not redeployed since: containerlab rewrites
+`clab-<lab>/topology-data.json` on every deploy, and a redeploy may hand out
+the management IPs in a different order. `clab_destroy.py` drops the cache
+entry before destroying the lab. The `--no-cache` flag of every tool forces a
+fresh inspect (and refreshes the cache). If orjson is installed it is used to
+parse the inspect output.
+
+Parallel sessions
+-----------------
+Every tool talks to at most `MAX_WORKERS` devices at a time (16 by default).
+The bottleneck is the lab host, which runs the ssh clients and all router
+containers. Set `CLAB_TOOLS_WORKERS` to change it, e.g. lower on a small VM,
+higher for labs with hundreds of routers on a big server.
+
+SSH connection sharing
+----------------------
+Scripts on Scrapli's system transport pass `SSH_MUX_OPTIONS`: OpenSSH
+connection sharing (ControlMaster, sockets in `~/.cache/clab-tools/ssh/`).
+clab-tools run back to back (within 60 s) reuse the already logged-in
+connection to each router.
+
+Topology file
+-------------
+`load_topology()` parses a `.clab.yml` with the LibYAML C loader when PyYAML
+was built with it (much faster on big topologies), `dump_topology()` writes it
+back the same way. The file is parsed on every
+call: it is small, and the hand-edited YAML file stays the only source of truth.
+
+Author
+------
+Stephan
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+try:  # optional: orjson parses the inspect payload straight from bytes, several times faster
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+INSPECT_CACHE_DIR = Path.home() / ".cache" / "clab-tools"
+INSPECT_CACHE_TTL = 300  # seconds; upper bound on top of the topology/deploy checks
+
+# Devices handled in parallel by every tool. The limit is on the lab host: each
+# session is an ssh client process here plus a login and commit in a router
+# container, and all routers of the lab share the host's CPUs.
+MAX_WORKERS = max(1, int(os.environ.get("CLAB_TOOLS_WORKERS", 16)))
+
+# OpenSSH connection sharing (system transport): the first session to a router
+# becomes a master that stays up for 60 s, so the next script run reuses it
+# instead of doing a new TCP + key exchange + login
+SSH_CONTROL_DIR = INSPECT_CACHE_DIR / "ssh"
+SSH_MUX_OPTIONS = {
+    "open_cmd": [
+        "-o", "ControlMaster=auto",
+        "-o", f"ControlPath={SSH_CONTROL_DIR}/%C",
+        "-o", "ControlPersist=60s",
+    ]
+}
+
+
+def find_topology_file():
+    """Topology file `containerlab inspect` resolves: $CLAB_LABFILE or the only *.clab.yml in CWD."""
+    env = os.environ.get("CLAB_LABFILE")
+    if env:
+        return Path(env)
+    files = list(Path.cwd().glob("*.clab.y*ml"))
+    return files[0] if len(files) == 1 else None
+
+
+def inspect_cache_file(topo: Path) -> Path:
+    """Cache file for a topology, e.g. ~/.cache/clab-tools/inspect-mylab.json."""
+    return INSPECT_CACHE_DIR / f"inspect-{topo.name.split('.')[0]}.json"
+
+
+def lab_deploy_mtime(topo: Path) -> int:
+    """Newest mtime of the clab-*/topology-data.json containerlab writes on every deploy (0 if none)."""
+    base = Path(os.environ.get("CLAB_LABDIR_BASE") or topo.resolve().parent)
+    stamps = []
+    for data_file in base.glob("clab-*/topology-data.json"):
+        try:
+            stamps.append(data_file.stat().st_mtime_ns)
+        except OSError:
+            pass
+    return max(stamps, default=0)
+
+
+def load_cached_inspect(topo: Path):
+    """Return the cached inspect result if neither the topology file nor the deployment changed since."""
+    try:
+        cached = _loads(inspect_cache_file(topo).read_bytes())
+        if (
+            cached["topology"] == str(topo.resolve())
+            and cached["topology_mtime"] == topo.stat().st_mtime_ns
+            and cached["deploy_mtime"] == lab_deploy_mtime(topo)
+            and time.time() - cached["written"] < INSPECT_CACHE_TTL
+        ):
+            return cached["data"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def store_cached_inspect(topo: Path, data):
+    """Share the inspect result with the other clab-tools (best effort, atomic replace)."""
+    entry = {
+        "topology": str(topo.resolve()),
+        "topology_mtime": topo.stat().st_mtime_ns,
+        "deploy_mtime": lab_deploy_mtime(topo),
+        "written": time.time(),
+        "data": data,
+    }
+    try:
+        INSPECT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache = inspect_cache_file(topo)
+        tmp = cache.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entry, separators=(",", ":")))
+        os.replace(tmp, cache)
+    except OSError:
+        pass
+
+
+def clear_cached_inspect():
+    """Drop the cached inspect result of the lab in the current directory (e.g. before a destroy)."""
+    topo = find_topology_file()
+    if topo is not None:
+        try:
+            inspect_cache_file(topo).unlink()
+        except OSError:
+            pass
+
+
+def run_containerlab_inspect(use_cache: bool = True) -> dict:
+    """
+    Run `containerlab inspect -f json` (or reuse a recent cached result) and
+    return the parsed JSON. Raises CalledProcessError if containerlab fails;
+    its error message goes straight to the terminal.
+    """
+    topo = find_topology_file()
+    if topo is not None and not topo.is_file():
+        topo = None
+    if use_cache and topo is not None:
+        cached = load_cached_inspect(topo)
+        if cached is not None:
+            return cached
+
+    result = subprocess.run(
+        ["containerlab", "inspect", "-f", "json"],
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    data = _loads(result.stdout)
+    if topo is not None:
+        store_cached_inspect(topo, data)
+    return data
+
+
+def load_topology(path: Path):
+    """Parsed topology YAML (safe loader, LibYAML C bindings if available)."""
+    import yaml  # only the tools that read the topology file need PyYAML
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(path.read_bytes(), Loader=loader)
+
+
+def dump_topology(path: Path, data):
+    """Write topology YAML back in file order (safe dumper, LibYAML C bindings if available)."""
+    import yaml
+
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    with open(path, "w") as f:
+        yaml.dump(data, f, Dumper=dumper, sort_keys=False)
+
+
+def setup_logging():
+    """
+    Log handler for the worker threads of a tool, set up once by its entry point.
+    One handler, one lock: lines from parallel workers are never interleaved.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
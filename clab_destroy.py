@@ -11,6 +11,7 @@ This script wrappes the "containerlab destroy" command and ensures that the devi
 ## Requirements
 
 - get_clab_config.py
+- clab_common.py (part of clab-tools) in the same directory
 - tbd
 
 ## Usage
@@ -24,9 +25,14 @@ Stephan Baenisch <stephan@baenisch.de>
 """
 
 
+import os
 import subprocess
 import sys
 
+from clab_common import clear_cached_inspect
+
+CONTAINERLAB = "/usr/bin/containerlab"
+
 def run_cmd(cmd: list) -> int:
     """
     Run a shell command and return its exit code.
@@ -44,6 +50,24 @@ def run_cmd(cmd: list) -> int:
         print(f"❌ Command not found: {cmd[0]}")
         return 127
 
+def exec_cmd(cmd: list):
+    """
+    Replace this Python process with cmd (no fork, no waiting).
+
+    The command's exit code becomes the script's exit code. Only returns
+    control (by exiting with 127) if the command cannot be started.
+
+    Args:
+        cmd (list): Command and arguments to run.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        os.execvp(cmd[0], cmd)
+    except FileNotFoundError:
+        print(f"❌ Command not found: {cmd[0]}")
+        sys.exit(127)
+
 def main():
     """
     Main execution logic:
@@ -56,13 +80,15 @@ def main():
 
     if ret == 0:
         print("✅ get_clab_config.py succeeded. Destroying lab...")
-        run_cmd(["/usr/bin/containerlab", "destroy"])
+        clear_cached_inspect()
+        exec_cmd([CONTAINERLAB, "destroy"])
     else:
         print("⚠️ get_clab_config.py failed.")
         choice = input("Do you still want to run containerlab destroy? (y/N): ").strip().lower()
         if choice == "y":
             print("🔥 Forcing containerlab destroy...")
-            run_cmd(["/usr/bin/containerlab", "destroy"])
+            clear_cached_inspect()
+            exec_cmd([CONTAINERLAB, "destroy"])
         else:
             print("🚫 Destroy skipped.")
 
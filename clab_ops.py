@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+clab_ops.py
+===========
+
+Run several Cisco XRd clab-tools against the running Containerlab lab in one go.
+
+Overview
+--------
+`containerlab inspect` is run (or read from the shared cache) once, and the
+parsed result is handed to each phase in the given order. The phases are the
+existing scripts next to this file, loaded as modules:
+
+- **ospf-clean** → `ospf-wiper.py` (asks before removing OSPF processes)
+- **noshut**     → `noshutter.py` (no shutdown on GigabitEthernet interfaces + LLDP)
+- **loopback**   → `loop-the-loop.py` (Loopback0 IPv4/IPv6 addresses)
+- **provision**  → shorthand for `noshut loopback`
+
+Usage
+-----
+From inside your Containerlab lab directory:
+
+    python3 clab_ops.py provision
+    python3 clab_ops.py ospf-clean noshut loopback
+
+`--no-cache` forces a fresh `containerlab inspect` (see `clab_common.py` for
+the cache shared by the clab-tools).
+
+Requirements
+------------
+- Python 3.8+
+- The phase scripts and `clab_common.py` in the same directory as this file
+- Scrapli (`pip install scrapli`)
+- Containerlab installed and working
+
+Author
+------
+Stephan
+"""
+
+import argparse
+import importlib.util
+from pathlib import Path
+
+from clab_common import run_containerlab_inspect, setup_logging
+
+# Phase name -> script in this directory providing run(<containerlab inspect JSON>)
+PHASES = {
+    "ospf-clean": "ospf-wiper.py",
+    "noshut": "noshutter.py",
+    "loopback": "loop-the-loop.py",
+}
+PROVISION = ("noshut", "loopback")
+
+
+def load_script(filename: str):
+    """Import a sibling script (file names contain dashes, so no plain import)."""
+    path = Path(__file__).resolve().with_name(filename)
+    spec = importlib.util.spec_from_file_location(path.stem.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(phases: list, use_cache: bool = True):
+    modules = [(phase, load_script(PHASES[phase])) for phase in phases]
+
+    # One inspect for all phases; every script reads the same JSON layout
+    data = run_containerlab_inspect(use_cache)
+
+    for phase, module in modules:
+        print(f"\n▶ Phase {phase} ({PHASES[phase]})")
+        module.run(data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run several clab-tools phases against the running Containerlab lab with a single inspect."
+    )
+    parser.add_argument(
+        "phases",
+        nargs="+",
+        choices=[*PHASES, "provision"],
+        help="Phases to run in the given order ('provision' = noshut loopback).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run `containerlab inspect` (ignore the cached result).",
+    )
+    args = parser.parse_args()
+
+    phases = []
+    for phase in args.phases:
+        phases.extend(PROVISION if phase == "provision" else [phase])
+    setup_logging()
+    main(phases, use_cache=not args.no_cache)
@@ -10,6 +10,8 @@ Modes
 -----
 1) Install Mode (default):
    - Verify local TFTP server (tftpd-hpa), parse TFTP_ADDRESS and TFTP_DIRECTORY.
+     The server is probed with a TFTP read request on TFTP_ADDRESS;
+     `systemctl is-active tftpd-hpa` is only used as a fallback.
    - Run `containerlab inspect --format json` and detect FortiGate nodes:
        * Hostnames starting with "fg-"
        * Fallback: nodes whose "kind" contains "fortigate"
@@ -19,13 +21,14 @@ Modes
    - Compare number of FortiGates vs number of licenses and allow selection of
      ALL or a subset of devices.
    - Use static credentials admin/admin to:
-       * Run "get system status" (Scrapli).
+       * Run "get system status" on all selected devices in parallel
+         (one Paramiko SSH connection per device, kept open for the restore).
        * Decide based on "License Status: Valid/Invalid".
        * For Valid: ask user if license should be replaced.
        * For Invalid/Unknown: proceed with upload (with confirmation for unknown).
-   - For each selected device:
+   - For each selected device (in parallel, one worker thread per device):
        * Copy selected .lic file to TFTP_DIRECTORY.
-       * Use Paramiko interactive shell to run:
+       * Use a Paramiko interactive shell on the same SSH connection to run:
             execute restore vmlicense tftp <file> <tftp_ip>
          answer "y" to confirmation and capture full output.
        * Check output for:
@@ -39,7 +42,8 @@ Modes
 
 2) Check-only Mode (--check-only):
    - Run `containerlab inspect --format json` and detect FortiGate nodes.
-   - Connect to each with Scrapli (admin/admin) and run "get system status".
+   - Connect to all of them in parallel with Scrapli (admin/admin) and run
+     "get system status".
    - Parse and print for each device:
        * Hostname
        * Mgmt IP
@@ -48,6 +52,13 @@ Modes
        * License Status
    - No TFTP or license files are used/required.
 
+Concurrency
+-----------
+- Device work (status queries, license restores) runs in a thread pool, one
+  SSH session per FortiGate; `--workers N` caps the parallel sessions
+  (default MAX_WORKERS, set by `CLAB_TOOLS_WORKERS`, see `clab_common.py`).
+  Interactive prompts are asked before the parallel restore phase starts.
+
 Dry-run
 -------
 - `--dry-run` only applies to Install Mode.
@@ -56,10 +67,19 @@ Dry-run
     * Does not connect to devices
     * Does not rename or delete files
 
+Caching
+-------
+- The `containerlab inspect` result comes from the cache shared by the
+  clab-tools (see `clab_common.py`).
+- `--no-cache` always runs `containerlab inspect` (and refreshes the cache).
+- `--inspect-json PATH` uses saved `containerlab inspect --format json` output
+  (e.g. fetched once for several tools) and does not run containerlab at all.
+
 Assumptions
 -----------
 - Python 3.8+.
 - "containerlab" is installed and available in PATH.
+- `clab_common.py` (part of clab-tools) is in the same directory as this script.
 - tftpd-hpa is used as the local TFTP server.
 - Scrapli & scrapli-community are installed: `pip install scrapli scrapli-community`.
 - Paramiko is installed: `pip install paramiko`.
@@ -70,43 +90,88 @@ Author: Stephan Baenisch
 """
 
 import argparse
-import glob
+import json
 import os
 import re
+import select
 import shutil
+import socket
+import stat
 import subprocess
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-import paramiko
-import yaml
-from scrapli import Scrapli
-from scrapli.exceptions import ScrapliException
+from clab_common import MAX_WORKERS, run_containerlab_inspect
+
+# paramiko (pulls in cryptography/OpenSSL) and scrapli are imported where
+# they are used, so --help and --dry-run start without loading them.
+if TYPE_CHECKING:
+    import paramiko
+    from scrapli import Scrapli
 
 DEFAULT_LICENSE_DIR = "/var/images/fortigate/Fortigate-VM_Lizenzen/"
 
+TFTPD_CONFIG = "/etc/default/tftpd-hpa"
+_TFTPD_CONF_RE = re.compile(
+    r'^[ \t]*(TFTP_ADDRESS|TFTP_DIRECTORY)[ \t]*=[ \t]*"?([^"\n]*)"?', re.MULTILINE
+)
+
+# One pass over "get system status" output:
+#   groups 1/2: "Serial-Number: ..." and "License Status: ..." lines
+#   group 3:    any line mentioning Expiration/Expiry/Expires (case-insensitive)
+_STATUS_RE = re.compile(
+    r"^[ \t]*(?:(Serial-Number|License Status):[ \t]*(.*?)"
+    r"|(.*(?i:Expiration|Expiry|Expires).*?))[ \t\r]*$",
+    re.MULTILINE,
+)
+
+# Non-existent file name requested when probing the TFTP server
+TFTP_PROBE_FILE = "clab-tools-probe-does-not-exist"
+
+TFTP_SETUP_HINT = """
+To install and configure a minimal TFTP server (Debian/Ubuntu example):
+
+  sudo apt install -y tftpd-hpa
+  sudo vi /etc/default/tftpd-hpa
+
+  TFTP_USERNAME="tftp"
+  TFTP_DIRECTORY="/srv/tftp"
+  TFTP_ADDRESS="0.0.0.0:69"
+  TFTP_OPTIONS="--secure --create"
+
+  sudo mkdir -p /srv/tftp
+  sudo chown -R tftp:tftp /srv/tftp
+  sudo chmod -R 755 /srv/tftp
+  sudo systemctl restart tftpd-hpa
+  sudo systemctl enable tftpd-hpa
+"""
+
 FG_USERNAME = "admin"
 FG_PASSWORD = "admin"
 
+CONFIRM_PROMPT = b"Do you want to continue? (y/n)"
+# Both must appear in the vmlicense restore output to count as success
+RESTORE_SUCCESS_MARKS = (
+    "Get VM license from tftp server OK.",
+    "VM license install succeeded. Rebooting firewall.",
+)
+
 
 # ---------------------------------------------------------------------
 # Containerlab & Node Helpers
 # ---------------------------------------------------------------------
 
 
-def run_containerlab_inspect() -> Dict:
-    """Run `containerlab inspect --format json` and return parsed data."""
-    result = subprocess.run(
-        ["containerlab", "inspect", "--format", "json"],
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-    # JSON is valid YAML; we can reuse yaml.safe_load
-    data = yaml.safe_load(result.stdout)
-    return data
+def load_inspect_json(path: str) -> Dict:
+    """
+    Read pre-fetched `containerlab inspect --format json` output (--inspect-json),
+    to be used instead of running containerlab in this process.
+    """
+    return json.loads(Path(path).expanduser().read_bytes())
 
 
 def get_fortigate_nodes(data: Dict) -> Tuple[List[Dict], str]:
@@ -126,7 +191,7 @@ def get_fortigate_nodes(data: Dict) -> Tuple[List[Dict], str]:
 
     # Same structure as your get_fortigate_config_tftp.py:
     # top-level key is lab name, value is list of node dicts
-    lab_name = list(data.keys())[0]
+    lab_name = next(iter(data))
     for node in data[lab_name]:
         name = node.get("name", "")
         kind = node.get("kind", "")
@@ -157,62 +222,74 @@ def pretty_print_fortis(nodes: List[Dict]) -> None:
 # ---------------------------------------------------------------------
 
 
-def check_tftp_server() -> Tuple[Optional[str], Optional[Path]]:
+def probe_tftp(tftp_ip: str, port: int = 69, timeout: float = 0.5) -> bool:
     """
-    Check if tftpd-hpa is running and parse IP + directory from
-    /etc/default/tftpd-hpa.
-
-    Returns (tftp_ip, tftp_dir) or (None, None) on failure.
+    Check that a TFTP server actually answers on tftp_ip:port.
 
-    tftp_ip is taken from TFTP_ADDRESS, e.g. "0.0.0.0:69" -> "0.0.0.0".
-    tftp_dir is the Path for TFTP_DIRECTORY.
+    Sends a read request for a file that does not exist; any TFTP reply
+    (normally ERROR "File not found", opcode 5) means the daemon is alive.
+    A wildcard TFTP_ADDRESS (0.0.0.0) is probed via 127.0.0.1.
     """
+    target = "127.0.0.1" if tftp_ip == "0.0.0.0" else tftp_ip
+    rrq = b"\x00\x01" + TFTP_PROBE_FILE.encode() + b"\x00octet\x00"
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.sendto(rrq, (target, port))
+            reply, _ = sock.recvfrom(516)
+        except OSError:
+            return False
+    # opcode 3 = DATA, 5 = ERROR
+    return len(reply) >= 2 and reply[:2] in (b"\x00\x03", b"\x00\x05")
+
+
+def tftpd_service_active() -> bool:
+    """Fallback check via `systemctl is-active tftpd-hpa`."""
     try:
         subprocess.run(
             ["systemctl", "is-active", "--quiet", "tftpd-hpa"], check=True
         )
-    except subprocess.CalledProcessError:
-        print("❌ TFTP server (tftpd-hpa) not active or missing.")
-        print(
-            """
-To install and configure a minimal TFTP server (Debian/Ubuntu example):
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
+    return True
 
-  sudo apt install -y tftpd-hpa
-  sudo vi /etc/default/tftpd-hpa
 
-  TFTP_USERNAME="tftp"
-  TFTP_DIRECTORY="/srv/tftp"
-  TFTP_ADDRESS="0.0.0.0:69"
-  TFTP_OPTIONS="--secure --create"
+def check_tftp_server() -> Tuple[Optional[str], Optional[Path]]:
+    """
+    Parse IP + directory from /etc/default/tftpd-hpa and check that the TFTP
+    server is running.
 
-  sudo mkdir -p /srv/tftp
-  sudo chown -R tftp:tftp /srv/tftp
-  sudo chmod -R 755 /srv/tftp
-  sudo systemctl restart tftpd-hpa
-  sudo systemctl enable tftpd-hpa
-"""
-        )
-        return None, None
+    Liveness is checked with a TFTP read request to TFTP_ADDRESS (no
+    subprocess); only if that gets no answer, `systemctl is-active tftpd-hpa`
+    is asked as a fallback.
 
-    tftp_ip = None
-    tftp_dir = None
+    Returns (tftp_ip, tftp_dir) or (None, None) on failure.
 
+    tftp_ip is taken from TFTP_ADDRESS, e.g. "0.0.0.0:69" -> "0.0.0.0".
+    tftp_dir is the Path for TFTP_DIRECTORY.
+    """
     try:
-        with open("/etc/default/tftpd-hpa") as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith("TFTP_ADDRESS="):
-                    val = line.split("=", 1)[1].strip().strip('"')
-                    tftp_ip = val.split(":", 1)[0]
-                elif line.startswith("TFTP_DIRECTORY="):
-                    val = line.split("=", 1)[1].strip().strip('"')
-                    tftp_dir = val
+        text: Optional[str] = Path(TFTPD_CONFIG).read_text()
     except FileNotFoundError:
-        print("⚠️ /etc/default/tftpd-hpa not found, cannot parse TFTP settings.")
+        text = None
+
+    # Last assignment wins, like the shell that sources this file
+    settings = {key: val.strip() for key, val in _TFTPD_CONF_RE.findall(text or "")}
+    tftp_ip, _, port = settings.get("TFTP_ADDRESS", "").partition(":")
+    tftp_dir = settings.get("TFTP_DIRECTORY")
+
+    alive = bool(tftp_ip) and probe_tftp(tftp_ip, int(port) if port.isdigit() else 69)
+    if not alive and not tftpd_service_active():
+        print("❌ TFTP server (tftpd-hpa) not active or missing.")
+        print(TFTP_SETUP_HINT)
+        return None, None
+
+    if text is None:
+        print(f"⚠️ {TFTPD_CONFIG} not found, cannot parse TFTP settings.")
         return None, None
 
     if not tftp_ip or not tftp_dir:
-        print("⚠️ Could not determine TFTP IP or directory from /etc/default/tftpd-hpa.")
+        print(f"⚠️ Could not determine TFTP IP or directory from {TFTPD_CONFIG}.")
         return None, None
 
     tftp_dir_path = Path(tftp_dir)
@@ -258,20 +335,55 @@ def find_unused_license_files(license_dir: Path) -> List[Path]:
     - Treat files that already contain "_fg-" in the filename as "used" and
       skip them (e.g. FGVMSLTM11111111_fg-gfk-1.lic).
     """
-    pattern = str(license_dir / "*.lic")
-    files = [Path(p) for p in glob.glob(pattern)]
+    with os.scandir(license_dir) as it:
+        names = [
+            e.name
+            for e in it
+            if e.name.endswith(".lic")
+            and not e.name.startswith(".")
+            # Already tagged with hostname, consider "used".
+            and "_fg-" not in e.name.lower()
+            and e.is_file()
+        ]
 
-    unused: List[Path] = []
-    used_suffix_re = re.compile(r"_fg-[^/]+\.lic$", re.IGNORECASE)
+    names.sort()
+    return [license_dir / name for name in names]
 
-    for f in files:
-        if used_suffix_re.search(f.name):
-            # Already tagged with hostname, consider "used".
-            continue
-        unused.append(f)
 
-    unused.sort()
-    return unused
+def copy_to_tftp(src: Path, dst: Path) -> None:
+    """
+    Copy a license file into the TFTP directory.
+
+    If the license directory and the TFTP directory are on the same
+    filesystem, the file is hardlinked instead (no data is copied; removing
+    the TFTP path later only drops the link). A link shares the inode and so
+    its permissions: only world-readable licenses are linked, a license only
+    the operator may read (e.g. 0600) is copied so the tftp user can serve it.
+
+    Otherwise data is moved in the kernel with os.sendfile; timestamps and
+    permissions are not copied since the TFTP copy is transient and deleted
+    after a successful restore. Falls back to shutil.copyfile where sendfile
+    to a regular file is not supported.
+    """
+    st = src.stat()
+    linkable = bool(st.st_mode & stat.S_IROTH)
+    if dst.exists() and dst.samefile(src):
+        if linkable:
+            return  # still linked from an earlier (failed) run
+        dst.unlink()  # never write the copy through a link into the license itself
+    try:
+        if linkable and st.st_dev == dst.parent.stat().st_dev:
+            os.link(src, dst)
+            return
+    except OSError:
+        pass  # EEXIST, EPERM (protected_hardlinks), EXDEV, ... -> copy instead
+
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            while os.sendfile(fdst.fileno(), fsrc.fileno(), None, 1 << 20):
+                pass
+    except OSError:
+        shutil.copyfile(src, dst)
 
 
 def rename_used_license_file(license_path: Path, hostname: str) -> Path:
@@ -381,11 +493,13 @@ def prompt_selection(
 # Scrapli & System Status Parsing
 # ---------------------------------------------------------------------
 
-def scrapli_connect(host: str) -> Scrapli:
+def scrapli_connect(host: str) -> "Scrapli":
     """
     Establish a Scrapli connection to a FortiGate with static credentials
     admin/admin.
     """
+    from scrapli import Scrapli
+
     conn = Scrapli(
         host=host,
         auth_username=FG_USERNAME,
@@ -398,12 +512,42 @@ def scrapli_connect(host: str) -> Scrapli:
     return conn
 
 
-def scrapli_get_system_status(conn: Scrapli) -> str:
+def scrapli_get_system_status(conn: "Scrapli") -> str:
     """Run 'get system status' and return the raw output."""
     response = conn.send_command("get system status")
     return response.result
 
 
+@dataclass(frozen=True)
+class SystemStatus:
+    """Fields of interest from "get system status" (None if not found)."""
+
+    serial: Optional[str] = None
+    license_status: Optional[str] = None
+    expiration: Optional[str] = None
+
+
+def parse_system_status(system_status_output: str) -> SystemStatus:
+    """
+    Extract the interesting fields of "get system status" in a single pass.
+
+    The first matching line wins for every field. The expiration is the text
+    after ':' if present, else the whole line.
+    """
+    fields: Dict[str, str] = {}
+    for key, value, expiry_line in _STATUS_RE.findall(system_status_output):
+        if key:
+            fields.setdefault(key, value)
+        elif "expiration" not in fields:
+            parts = expiry_line.split(":", 1)
+            fields["expiration"] = (parts[1].strip() if len(parts) == 2 else "") or expiry_line
+    return SystemStatus(
+        serial=fields.get("Serial-Number") or None,
+        license_status=fields.get("License Status") or None,
+        expiration=fields.get("expiration"),
+    )
+
+
 def parse_license_status(system_status_output: str) -> Optional[str]:
     """
     Parse "get system status" output and return the license status:
@@ -413,26 +557,12 @@ def parse_license_status(system_status_output: str) -> Optional[str]:
     - Any other string if a different status is found (e.g., "Trial")
     - None if no 'License Status:' line is present.
     """
-    for line in system_status_output.splitlines():
-        line = line.strip()
-        if line.startswith("License Status:"):
-            parts = line.split(":", 1)
-            if len(parts) == 2:
-                status = parts[1].strip()
-                return status or None
-    return None
+    return parse_system_status(system_status_output).license_status
 
 
 def parse_serial_number(system_status_output: str) -> Optional[str]:
     """Parse 'Serial-Number:' from get system status output."""
-    for line in system_status_output.splitlines():
-        line = line.strip()
-        if line.startswith("Serial-Number:"):
-            parts = line.split(":", 1)
-            if len(parts) == 2:
-                serial = parts[1].strip()
-                return serial or None
-    return None
+    return parse_system_status(system_status_output).serial
 
 
 def parse_license_expiration(system_status_output: str) -> Optional[str]:
@@ -442,110 +572,170 @@ def parse_license_expiration(system_status_output: str) -> Optional[str]:
     Looks for lines containing 'Expiration', 'Expiry', or 'Expires'.
     Returns the text after ':' if present, else the whole line.
     """
-    for line in system_status_output.splitlines():
-        if re.search(r"(Expiration|Expiry|Expires)", line, re.IGNORECASE):
-            line = line.strip()
-            parts = line.split(":", 1)
-            if len(parts) == 2:
-                return parts[1].strip() or line
-            return line
-    return None
+    return parse_system_status(system_status_output).expiration
 
 
 # ---------------------------------------------------------------------
-# Paramiko VM License Restore (debug-friendly)
+# Paramiko FortiGate Session (status + VM license restore, debug-friendly)
 # ---------------------------------------------------------------------
 
 
-def restore_vmlicense_paramiko(
-    host: str,
-    hostname: str,
-    license_filename: str,
-    tftp_ip: str,
-    timeout: int = 120,
-) -> Tuple[bool, str]:
-    """
-    Use a raw Paramiko shell to execute:
-      execute restore vmlicense tftp <file> <tftp_ip>
-
-    - Wait for 'Do you want to continue? (y/n)' and send 'y'.
-    - Read EVERYTHING until the device closes the connection or timeout.
-    - Print detailed debug output of all received lines.
-    - Treat the operation as success **only if** the output contains BOTH:
-        'Get VM license from tftp server OK.'
-        'VM license install succeeded. Rebooting firewall.'
-
-    Returns:
-        (success: bool, full_output: str)
-    """
-    print(f"[{hostname}] [DBG] Starting Paramiko vmlicense restore on {host}...")
-
-    client = paramiko.SSHClient()
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    client.connect(
-        hostname=host,
-        username=FG_USERNAME,
-        password=FG_PASSWORD,
-        look_for_keys=False,
-        allow_agent=False,
-        timeout=20,
-    )
-
-    chan = client.get_transport().open_session()
-    chan.get_pty()
-    chan.invoke_shell()
+class FortiSession:
+    """
+    One Paramiko SSH connection to a FortiGate, used in install mode for both
+    'get system status' and the vmlicense restore.
 
-    cmd = f"execute restore vmlicense tftp {license_filename} {tftp_ip}\n"
-    print(f"[{hostname}] [DBG] Sending command: {cmd.strip()}")
-    chan.send(cmd)
+    Both run as separate channels on the same Transport, so each device pays
+    the TCP + SSH key exchange + auth cost only once.
+    """
 
-    buff = ""
-    answered = False
-    start = time.time()
+    def __init__(self, host: str, hostname: str) -> None:
+        self.host = host
+        self.hostname = hostname
+        self.client: Optional["paramiko.SSHClient"] = None
+
+    def open(self) -> "FortiSession":
+        import paramiko
+
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(
+            hostname=self.host,
+            username=FG_USERNAME,
+            password=FG_PASSWORD,
+            look_for_keys=False,
+            allow_agent=False,
+            timeout=20,
+        )
+        self.client = client
+        return self
+
+    def _transport(self) -> "paramiko.Transport":
+        """
+        Return the shared Transport, reconnecting if the device dropped the
+        session (e.g. admin idle timeout while the user answered prompts).
+        """
+        transport = self.client.get_transport() if self.client else None
+        if transport is None or not transport.is_active():
+            self.close()
+            self.open()
+            transport = self.client.get_transport()
+        return transport
+
+    def get_system_status(self, timeout: int = 30) -> str:
+        """Run 'get system status' on an exec channel and return the raw output."""
+        chan = self._transport().open_session()
+        try:
+            chan.settimeout(timeout)
+            chan.exec_command("get system status")
+            chunks = []
+            while True:
+                data = chan.recv(4096)
+                if not data:
+                    break
+                chunks.append(data)
+        finally:
+            chan.close()
+        return b"".join(chunks).decode(errors="ignore")
+
+    def restore_vmlicense(
+        self,
+        license_filename: str,
+        tftp_ip: str,
+        timeout: int = 120,
+    ) -> Tuple[bool, str]:
+        """
+        Open an interactive shell channel and execute:
+          execute restore vmlicense tftp <file> <tftp_ip>
+
+        - Wait for 'Do you want to continue? (y/n)' and send 'y'.
+        - Read EVERYTHING until the device closes the connection or timeout.
+        - Print detailed debug output of all received lines.
+        - Treat the operation as success **only if** the output contains BOTH:
+            'Get VM license from tftp server OK.'
+            'VM license install succeeded. Rebooting firewall.'
+
+        Returns:
+            (success: bool, full_output: str)
+        """
+        print(f"[{self.hostname}] [DBG] Starting Paramiko vmlicense restore on {self.host}...")
+
+        chan = self._transport().open_session()
+        chan.get_pty()
+        chan.invoke_shell()
+
+        cmd = f"execute restore vmlicense tftp {license_filename} {tftp_ip}\n"
+        print(f"[{self.hostname}] [DBG] Sending command: {cmd.strip()}")
+        chan.send(cmd)
+
+        buff = bytearray()
+        answered = False
+        # Only scan what arrived since the last check for the confirmation prompt
+        prompt_scanned_upto = 0
+        deadline = time.time() + timeout
+
+        chan.settimeout(1.0)
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                print(f"[{self.hostname}] [DBG] TIMEOUT waiting for vmlicense restore output.")
+                break
 
-    while True:
-        if chan.recv_ready():
-            data = chan.recv(4096).decode(errors="ignore")
-            if data:
+            # Block on channel readiness instead of sleeping between polls
+            readable, _, _ = select.select([chan], [], [], min(1.0, remaining))
+            if readable:
+                try:
+                    data = chan.recv(4096)
+                except socket.timeout:
+                    continue
+                if not data:
+                    # Device closed the channel (reboot after install)
+                    break
                 buff += data
-                for line in data.splitlines():
-                    print(f"[{hostname}] [DBG] RECV: {line}")
-
-                if ("Do you want to continue? (y/n)" in buff) and not answered:
-                    print(f"[{hostname}] [DBG] Sending 'y' to confirmation prompt")
-                    chan.send("y\n")
-                    answered = True
+                for line in data.decode(errors="ignore").splitlines():
+                    print(f"[{self.hostname}] [DBG] RECV: {line}")
+
+                if not answered:
+                    # Step back by the prompt length in case it was split across chunks
+                    scan_from = max(0, prompt_scanned_upto - len(CONFIRM_PROMPT))
+                    if buff.find(CONFIRM_PROMPT, scan_from) != -1:
+                        print(f"[{self.hostname}] [DBG] Sending 'y' to confirmation prompt")
+                        chan.send("y\n")
+                        answered = True
+                    prompt_scanned_upto = len(buff)
+
+            if chan.exit_status_ready() and not chan.recv_ready():
+                break
 
-        if chan.exit_status_ready():
-            if chan.recv_ready():
-                continue
-            break
+        chan.close()
 
-        if time.time() - start > timeout:
-            print(f"[{hostname}] [DBG] TIMEOUT waiting for vmlicense restore output.")
-            break
+        # Decode once; chunk boundaries may split multi-byte characters
+        output = buff.decode(errors="ignore")
 
-        time.sleep(0.5)
+        print(f"[{self.hostname}] --- vmlicense raw output start ---")
+        print(output)
+        print(f"[{self.hostname}] --- vmlicense raw output end ---")
 
-    chan.close()
-    client.close()
+        # Checked once on the complete output, not on every received chunk
+        if all(mark in output for mark in RESTORE_SUCCESS_MARKS):
+            print(f"[{self.hostname}] ✅ VM license install reported SUCCESS (Paramiko).")
+            return True, output
 
-    print(f"[{hostname}] --- vmlicense raw output start ---")
-    print(buff)
-    print(f"[{hostname}] --- vmlicense raw output end ---")
+        print(
+            f"[{self.hostname}] ❌ Expected success strings not found in output; "
+            f"treating as failure."
+        )
+        return False, output
 
-    success_mark_1 = "Get VM license from tftp server OK." in buff
-    success_mark_2 = "VM license install succeeded. Rebooting firewall." in buff
 
-    if success_mark_1 and success_mark_2:
-        print(f"[{hostname}] ✅ VM license install reported SUCCESS (Paramiko).")
-        return True, buff
 
-    print(
-        f"[{hostname}] ❌ Expected success strings not found in output; "
-        f"treating as failure."
-    )
-    return False, buff
+    def close(self) -> None:
+        if self.client is not None:
+            try:
+                self.client.close()
+            except Exception:
+                pass
+            self.client = None
 
 
 # ---------------------------------------------------------------------
@@ -553,21 +743,66 @@ def restore_vmlicense_paramiko(
 # ---------------------------------------------------------------------
 
 
-def run_license_check_only() -> int:
+def _check_one(node: Dict) -> Tuple[Tuple[str, str, str, str, str, str], List[str]]:
+    """
+    Check a single FortiGate (runs inside a worker thread).
+
+    Returns (result_row, log_lines). Log lines are collected and printed by
+    the caller so that the output of parallel workers does not interleave.
+    """
+    from scrapli.exceptions import ScrapliException
+
+    hostname = node.get("name", "unknown")
+    ip_raw = node.get("ipv4_address", "0.0.0.0/0")
+    mgmt_ip = ip_raw.split("/")[0]
+
+    log = [f"--- {hostname} ({mgmt_ip}) ---"]
+    try:
+        conn = scrapli_connect(mgmt_ip)
+    except ScrapliException as exc:
+        log.append(f"  ❌ Scrapli connection failed: {exc}")
+        return (hostname, mgmt_ip, "N/A", "N/A", "UNREACHABLE", str(exc)), log
+
+    try:
+        status = parse_system_status(scrapli_get_system_status(conn))
+        license_status = status.license_status or "UNKNOWN"
+        serial = status.serial or "N/A"
+        expiry = status.expiration or "N/A"
+
+        log.append(f"  Serial-Number      : {serial}")
+        log.append(f"  License Status     : {license_status}")
+        log.append(f"  License Expiration : {expiry}")
+
+        return (hostname, mgmt_ip, serial, expiry, license_status, ""), log
+
+    except ScrapliException as exc:
+        log.append(f"  ❌ Error while running get system status: {exc}")
+        return (hostname, mgmt_ip, "N/A", "N/A", "ERROR", str(exc)), log
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def run_license_check_only(
+    use_cache: bool = True, workers: int = MAX_WORKERS, lab_data: Optional[Dict] = None
+) -> int:
     """
     License check mode:
-    - Discover FortiGates via containerlab
-    - Connect to each (Scrapli) and run 'get system status'
+    - Discover FortiGates via containerlab (or the pre-fetched `lab_data`)
+    - Connect to all of them in parallel (Scrapli) and run 'get system status'
     - Print a summary table: Hostname, Mgmt IP, Serial, Expiration, Status
     """
     print("=== FortiGate VM License Check (check-only mode) ===")
 
     print("\n[STEP 1] Discovering FortiGate nodes via `containerlab inspect`...")
-    try:
-        lab_data = run_containerlab_inspect()
-    except subprocess.CalledProcessError as exc:
-        print(f"❌ Failed to run containerlab inspect: {exc}")
-        return 1
+    if lab_data is None:
+        try:
+            lab_data = run_containerlab_inspect(use_cache)
+        except subprocess.CalledProcessError as exc:
+            print(f"❌ Failed to run containerlab inspect: {exc}")
+            return 1
 
     nodes, labname = get_fortigate_nodes(lab_data)
     if not nodes:
@@ -578,41 +813,15 @@ def run_license_check_only() -> int:
 
     print("\n[STEP 2] Checking license status on all FortiGates...\n")
 
-    results = []  # list of (hostname, mgmt_ip, serial, expiry, status, note)
-
-    for node in nodes:
-        hostname = node.get("name", "unknown")
-        ip_raw = node.get("ipv4_address", "0.0.0.0/0")
-        mgmt_ip = ip_raw.split("/")[0]
-
-        print(f"--- {hostname} ({mgmt_ip}) ---")
-        try:
-            conn = scrapli_connect(mgmt_ip)
-        except ScrapliException as exc:
-            print(f"  ❌ Scrapli connection failed: {exc}")
-            results.append((hostname, mgmt_ip, "N/A", "N/A", "UNREACHABLE", str(exc)))
-            continue
-
-        try:
-            output = scrapli_get_system_status(conn)
-            license_status = parse_license_status(output) or "UNKNOWN"
-            serial = parse_serial_number(output) or "N/A"
-            expiry = parse_license_expiration(output) or "N/A"
+    # list of (hostname, mgmt_ip, serial, expiry, status, note), in node order
+    results: List[Optional[Tuple[str, str, str, str, str, str]]] = [None] * len(nodes)
 
-            print(f"  Serial-Number      : {serial}")
-            print(f"  License Status     : {license_status}")
-            print(f"  License Expiration : {expiry}")
-
-            results.append((hostname, mgmt_ip, serial, expiry, license_status, ""))
-
-        except ScrapliException as exc:
-            print(f"  ❌ Error while running get system status: {exc}")
-            results.append((hostname, mgmt_ip, "N/A", "N/A", "ERROR", str(exc)))
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
+    with ThreadPoolExecutor(max_workers=min(workers, len(nodes))) as pool:
+        futures = {pool.submit(_check_one, node): idx for idx, node in enumerate(nodes)}
+        for fut in as_completed(futures):
+            row, log = fut.result()
+            print("\n".join(log))
+            results[futures[fut]] = row
 
     # Print summary table
     print("\n=== LICENSE SUMMARY ===")
@@ -638,7 +847,106 @@ def run_license_check_only() -> int:
 # ---------------------------------------------------------------------
 
 
-def run_install_mode(dry_run: bool = False) -> int:
+def fetch_license_status(
+    hostname: str, mgmt_ip: str
+) -> Tuple[Optional[FortiSession], Optional[str], Optional[str]]:
+    """
+    Open a FortiSession and run 'get system status' (runs inside a worker thread).
+
+    Returns (session, license_status, error_message). On success the session
+    stays open for the license restore; on error session is None.
+    """
+    import paramiko
+
+    session = FortiSession(mgmt_ip, hostname)
+    try:
+        session.open()
+    except (paramiko.SSHException, OSError) as exc:
+        session.close()
+        return None, None, f"SSH connection failed: {exc}"
+
+    try:
+        return session, parse_license_status(session.get_system_status()), None
+    except (paramiko.SSHException, OSError) as exc:
+        session.close()
+        return None, None, f"Error while running get system status via SSH: {exc}"
+
+
+def install_license(
+    session: FortiSession,
+    license_path: Path,
+    tftp_dir: Path,
+    tftp_ip: str,
+) -> Tuple[str, str]:
+    """
+    Copy one license to the TFTP directory, restore it on the FortiGate over
+    the already open session and rename/clean up on success (runs inside a
+    worker thread). The session is closed when done.
+
+    Returns (result, message) for the summary.
+    """
+    import paramiko
+
+    hostname = session.hostname
+    try:
+        license_filename = license_path.name
+
+        # --- COPY LICENSE TO TFTP DIRECTORY ---
+        tftp_license_path = tftp_dir / license_filename
+        try:
+            copy_to_tftp(license_path, tftp_license_path)
+            print(f"[{hostname}] Copied license file to TFTP directory: {tftp_license_path}")
+        except Exception as exc:
+            msg = f"Failed to copy license to TFTP directory: {exc}"
+            print(f"[{hostname}] " + msg)
+            return "FAILED", msg
+
+        # --- RESTORE LICENSE USING PARAMIKO ---
+        try:
+            ok, restore_output = session.restore_vmlicense(license_filename, tftp_ip)
+        except (paramiko.SSHException, OSError) as exc:
+            msg = f"Paramiko session failed: {exc}; keeping TFTP copy."
+            print(f"[{hostname}] " + msg)
+            return "FAILED", msg
+
+        if not ok:
+            msg = (
+                "License restore did not report success; "
+                "leaving license file unchanged and keeping TFTP copy."
+            )
+            print(f"[{hostname}] " + msg)
+            # do NOT rename license file
+            return "FAILED", msg
+
+        # --- SUCCESS: RENAME ORIGINAL LICENSE FILE ---
+        new_path = rename_used_license_file(license_path, hostname)
+        print(f"[{hostname}] Renamed used license file to: {new_path.name}")
+
+        # --- CLEANUP TFTP FILE ---
+        if tftp_license_path.exists():
+            try:
+                tftp_license_path.unlink()
+                print(f"[{hostname}] Cleaned up temporary TFTP file: {tftp_license_path}")
+            except Exception as exc:
+                print(f"[{hostname}] ⚠️ Failed to clean up TFTP file {tftp_license_path}: {exc}")
+        else:
+            print(f"[{hostname}] ⚠️ TFTP file not found for cleanup: {tftp_license_path}")
+
+        return (
+            "SUCCESS",
+            f"License installed from {new_path.name} (TFTP {tftp_ip}). "
+            f"Device rebooting.",
+        )
+    finally:
+        session.close()
+
+
+def run_install_mode(
+    dry_run: bool = False,
+    use_cache: bool = True,
+    workers: int = MAX_WORKERS,
+    lab_data: Optional[Dict] = None,
+) -> int:
     print("=== FortiGate VM License Installer (fortilic.py) ===")
     if dry_run:
         print("*** DRY-RUN MODE ENABLED: No SSH, no changes, no file renames. ***")
@@ -652,11 +960,12 @@ def run_install_mode(dry_run: bool = False) -> int:
 
     # 2) Discover FortiGates via containerlab
     print("\n[STEP 2] Discovering FortiGate nodes via `containerlab inspect`...")
-    try:
-        lab_data = run_containerlab_inspect()
-    except subprocess.CalledProcessError as exc:
-        print(f"❌ Failed to run containerlab inspect: {exc}")
-        return 1
+    if lab_data is None:
+        try:
+            lab_data = run_containerlab_inspect(use_cache)
+        except subprocess.CalledProcessError as exc:
+            print(f"❌ Failed to run containerlab inspect: {exc}")
+            return 1
 
     nodes, labname = get_fortigate_nodes(lab_data)
     if not nodes:
@@ -716,29 +1025,40 @@ def run_install_mode(dry_run: bool = False) -> int:
         "(this script copies them into the TFTP directory for you).\n"
     )
 
-    summary = []
-
-    # 5) Process each selected FortiGate
+    summary: List[Optional[Tuple[str, str, str]]] = [None] * len(chosen_nodes)
+    targets = []
     for node in chosen_nodes:
-        hostname = node.get("name", "unknown")
         ip_raw = node.get("ipv4_address", "0.0.0.0/0")
-        mgmt_ip = ip_raw.split("/")[0]
-
+        targets.append((node.get("name", "unknown"), ip_raw.split("/")[0]))
+
+    # 5) Query license status on all selected FortiGates in parallel
+    statuses: Dict[int, Tuple[Optional[FortiSession], Optional[str], Optional[str]]] = {}
+    if not dry_run:
+        print("[STEP 5] Querying license status on selected FortiGates...")
+        with ThreadPoolExecutor(max_workers=min(workers, len(targets))) as pool:
+            futures = {
+                pool.submit(fetch_license_status, hostname, mgmt_ip): idx
+                for idx, (hostname, mgmt_ip) in enumerate(targets)
+            }
+            for fut in as_completed(futures):
+                statuses[futures[fut]] = fut.result()
+
+    # 6) Decide per FortiGate (interactive, serial) and assign licenses
+    jobs = []  # list of (idx, session, license_path)
+    for idx, (hostname, mgmt_ip) in enumerate(targets):
         print(f"\n=== Processing {hostname} ({mgmt_ip}) ===")
 
         if not available_licenses:
             msg = "No license files remaining."
             print("  " + msg)
-            summary.append((hostname, "SKIPPED", msg))
+            summary[idx] = (hostname, "SKIPPED", msg)
             continue
 
-        # Assign the first available license to this node
-        license_path = available_licenses.pop(0)
-        license_filename = license_path.name
-
-        print(f"  Assigned license file: {license_filename}")
-
         if dry_run:
+            # Assign the first available license to this node
+            license_path = available_licenses.pop(0)
+            license_filename = license_path.name
+            print(f"  Assigned license file: {license_filename}")
             msg = (
                 f"[DRY-RUN] Would copy {license_path} to {tftp_dir / license_filename}, "
                 f"connect to {mgmt_ip} as {FG_USERNAME}/{FG_PASSWORD}, "
@@ -747,125 +1067,70 @@ def run_install_mode(dry_run: bool = False) -> int:
                 "rename license file with hostname and clean up TFTP copy."
             )
             print("  " + msg)
-            summary.append((hostname, "DRY-RUN", msg))
-            continue
-
-        # Scrapli connection for get system status / license decision
-        try:
-            conn = scrapli_connect(mgmt_ip)
-        except ScrapliException as exc:
-            msg = f"Scrapli connection failed: {exc}"
-            print("  " + msg)
-            summary.append((hostname, "FAILED", msg))
-            # Put license back so it can be used later
-            available_licenses.insert(0, license_path)
-            continue
-
-        try:
-            print("  Running 'get system status'...")
-            status_output = scrapli_get_system_status(conn)
-            status = parse_license_status(status_output)
-            print("  License Status:", status if status else "UNKNOWN")
-
-            if status == "Valid":
-                ans = input(
-                    f"  License is VALID on {hostname}. "
-                    "Upload a NEW license anyway? [y/N]: "
-                ).strip().lower()
-                if ans not in ("y", "yes"):
-                    msg = "License valid, user chose NOT to replace."
-                    print("  " + msg)
-                    summary.append((hostname, "SKIPPED", msg))
-                    conn.close()
-                    # Put license back so it stays unused
-                    available_licenses.insert(0, license_path)
-                    continue
-            elif status is None:
-                ans = input(
-                    f"  Could not determine license status on {hostname}. "
-                    "Upload license anyway? [y/N]: "
-                ).strip().lower()
-                if ans not in ("y", "yes"):
-                    msg = "Unknown license status, user chose NOT to upload."
-                    print("  " + msg)
-                    summary.append((hostname, "SKIPPED", msg))
-                    conn.close()
-                    available_licenses.insert(0, license_path)
-                    continue
-            else:
-                # "Invalid" or other status - proceed without extra confirmation
-                print(f"  License status is '{status}', proceeding with upload.")
-
-            conn.close()
-
-        except ScrapliException as exc:
-            msg = f"Error while processing {hostname} via Scrapli: {exc}"
-            print("  " + msg)
-            summary.append((hostname, "FAILED", msg))
-            try:
-                conn.close()
-            except Exception:
-                pass
-            available_licenses.insert(0, license_path)
+            summary[idx] = (hostname, "DRY-RUN", msg)
             continue
 
-        # --- COPY LICENSE TO TFTP DIRECTORY ---
-        tftp_license_path = tftp_dir / license_filename
-        try:
-            shutil.copy2(license_path, tftp_license_path)
-            print(f"  Copied license file to TFTP directory: {tftp_license_path}")
-        except Exception as exc:
-            msg = f"Failed to copy license to TFTP directory: {exc}"
-            print("  " + msg)
-            summary.append((hostname, "FAILED", msg))
-            # Put license back so it can be retried later
-            available_licenses.insert(0, license_path)
+        session, status, error = statuses[idx]
+        if error:
+            print("  " + error)
+            summary[idx] = (hostname, "FAILED", error)
             continue
 
-        # --- RESTORE LICENSE USING PARAMIKO ---
-        ok, restore_output = restore_vmlicense_paramiko(
-            host=mgmt_ip,
-            hostname=hostname,
-            license_filename=license_filename,
-            tftp_ip=tftp_ip,
-        )
-
-        if not ok:
-            msg = (
-                "License restore did not report success; "
-                "leaving license file unchanged and keeping TFTP copy."
-            )
-            print("  " + msg)
-            summary.append((hostname, "FAILED", msg))
-            # do NOT rename license file
-            continue
-
-        # --- SUCCESS: RENAME ORIGINAL LICENSE FILE ---
-        new_path = rename_used_license_file(license_path, hostname)
-        print(f"  Renamed used license file to: {new_path.name}")
-
-        # --- CLEANUP TFTP FILE ---
-        if tftp_license_path.exists():
-            try:
-                tftp_license_path.unlink()
-                print(f"  Cleaned up temporary TFTP file: {tftp_license_path}")
-            except Exception as exc:
-                print(f"  ⚠️ Failed to clean up TFTP file {tftp_license_path}: {exc}")
+        print("  License Status:", status if status else "UNKNOWN")
+
+        if status == "Valid":
+            ans = input(
+                f"  License is VALID on {hostname}. "
+                "Upload a NEW license anyway? [y/N]: "
+            ).strip().lower()
+            if ans not in ("y", "yes"):
+                msg = "License valid, user chose NOT to replace."
+                print("  " + msg)
+                summary[idx] = (hostname, "SKIPPED", msg)
+                continue
+        elif status is None:
+            ans = input(
+                f"  Could not determine license status on {hostname}. "
+                "Upload license anyway? [y/N]: "
+            ).strip().lower()
+            if ans not in ("y", "yes"):
+                msg = "Unknown license status, user chose NOT to upload."
+                print("  " + msg)
+                summary[idx] = (hostname, "SKIPPED", msg)
+                continue
         else:
-            print(f"  ⚠️ TFTP file not found for cleanup: {tftp_license_path}")
-
-        summary.append(
-            (
-                hostname,
-                "SUCCESS",
-                f"License installed from {new_path.name} (TFTP {tftp_ip}). "
-                f"Device rebooting.",
-            )
-        )
+            # "Invalid" or other status - proceed without extra confirmation
+            print(f"  License status is '{status}', proceeding with upload.")
+
+        # Assign the first available license to this node
+        license_path = available_licenses.pop(0)
+        print(f"  Assigned license file: {license_path.name}")
+        jobs.append((idx, session, license_path))
+
+    # 7) Copy + restore licenses in parallel (license filenames are unique,
+    #    so the TFTP copies cannot collide)
+    if jobs:
+        print(f"\n[STEP 7] Installing licenses on {len(jobs)} FortiGate(s)...")
+        with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = {
+                pool.submit(install_license, session, license_path, tftp_dir, tftp_ip): (
+                    idx, session.hostname
+                )
+                for idx, session, license_path in jobs
+            }
+            for fut in as_completed(futures):
+                idx, hostname = futures[fut]
+                result, msg = fut.result()
+                summary[idx] = (hostname, result, msg)
+
+    # Close sessions of devices that were skipped after the status query
+    for session, _, _ in statuses.values():
+        if session is not None:
+            session.close()
 
     # Summary
     print("\n=== SUMMARY ===")
-    for host, result, msg in summary:
+    for host, result, msg in filter(None, summary):
         print(f"{host:15} : {result:7} - {msg}")
 
     print("\nDone (install mode).")
@@ -876,15 +1141,25 @@ def run_install_mode(dry_run: bool = False) -> int:
 # Main Entry
 # ---------------------------------------------------------------------
 
-def main(mode: str, dry_run: bool = False) -> int:
+def main(
+    mode: str,
+    dry_run: bool = False,
+    use_cache: bool = True,
+    workers: int = MAX_WORKERS,
+    lab_data: Optional[Dict] = None,
+) -> int:
     if mode == "check":
-        return run_license_check_only()
+        return run_license_check_only(use_cache=use_cache, workers=workers, lab_data=lab_data)
 
     if mode == "install":
-        return run_install_mode(dry_run=False)
+        return run_install_mode(
+            dry_run=False, use_cache=use_cache, workers=workers, lab_data=lab_data
+        )
 
     if mode == "dry-run":
-        return run_install_mode(dry_run=True)
+        return run_install_mode(
+            dry_run=True, use_cache=use_cache, workers=workers, lab_data=lab_data
+        )
 
     print(f"❌ Unknown mode '{mode}'")
     return 1
@@ -902,7 +1177,9 @@ if __name__ == "__main__":
         usage=(
             "\n\n  fortilic.py --install\n"
             "  fortilic.py --dry-run\n"
-            "  fortilic.py --check\n\n"
+            "  fortilic.py --check\n"
+            "  fortilic.py --check --no-cache\n"
+            "  fortilic.py --check --inspect-json inspect.json\n\n"
             "No default action. You must specify an option."
         ),
     )
@@ -924,6 +1201,25 @@ if __name__ == "__main__":
         action="store_true",
         help="Check license status on all FortiGates (no installation)."
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=MAX_WORKERS,
+        metavar="N",
+        help=f"Max. parallel SSH sessions to the FortiGates (default: {MAX_WORKERS})."
+    )
+
+    inspect_group = parser.add_mutually_exclusive_group()
+    inspect_group.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run `containerlab inspect` (ignore the cached result)."
+    )
+    inspect_group.add_argument(
+        "--inspect-json",
+        metavar="PATH",
+        help="Use saved `containerlab inspect --format json` output instead of running it."
+    )
 
     args = parser.parse_args()
 
@@ -946,7 +1242,22 @@ if __name__ == "__main__":
     elif args.install:
         mode = "install"
 
-    raise SystemExit(main(mode=mode))
+    lab_data = None
+    if args.inspect_json:
+        try:
+            lab_data = load_inspect_json(args.inspect_json)
+        except (OSError, ValueError) as exc:
+            print(f"❌ Cannot read inspect JSON {args.inspect_json}: {exc}")
+            raise SystemExit(1)
+
+    raise SystemExit(
+        main(
+            mode=mode,
+            use_cache=not args.no_cache,
+            workers=max(1, args.workers),
+            lab_data=lab_data,
+        )
+    )
 
 
 
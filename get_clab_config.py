@@ -12,11 +12,12 @@ Overview
 This script automates configuration backup for network labs created with
 [Containerlab](https://containerlab.dev/). It performs the following steps:
 
-1. Runs `containerlab inspect` in the current lab directory.
+1. Runs `containerlab inspect --format json` in the current lab directory.
 2. Parses the device list, identifying Huawei VRP and Cisco XRd nodes.
-3. Connects via SSH to each device using [Scrapli](https://carlmontanari.github.io/scrapli/),
-   executes the appropriate command to retrieve the running configuration, and saves
-   it in the correct `config/` directory for each node.
+3. Connects via SSH to each device using [Scrapli](https://carlmontanari.github.io/scrapli/)
+   (up to `MAX_WORKERS` devices in parallel, see `clab_common.py`), executes the appropriate command to
+   retrieve the running configuration, and saves it in the correct `config/`
+   directory for each node.
 4. Creates a backup of the lab's `.clab.yml` topology file.
 5. Inserts a `startup-config` entry for each device, pointing to the saved configuration file.
 
@@ -36,6 +37,7 @@ Requirements
 - Python 3.8+
 - [Scrapli](https://pypi.org/project/scrapli/)
 - [PyYAML](https://pypi.org/project/PyYAML/)
+- `clab_common.py` (part of clab-tools) in the same directory as this script
 - Containerlab installed and working
 - SSH connectivity to all lab devices (container host must be able to resolve container names)
 
@@ -57,55 +59,38 @@ After running, configurations will be saved to:
 And your `<labname>.clab.yml` will be updated with `startup-config` entries.
 A backup of the original `.clab.yml` will be created with the `.bak` extension.
 
+`--no-cache` forces a fresh `containerlab inspect` instead of reusing the
+result cached by the clab-tools (see `clab_common.py`).
+
 Author
 ------
 Stephan Baenisch <stephan@baenisch.de>
 """
 
-import os
-import re
-import subprocess
-import yaml
+import argparse
 from scrapli import Scrapli
 from datetime import datetime
 from pathlib import Path
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
-# Default credentials
-CREDENTIALS = {
-    "huawei_vrp": ("admin", "admin"),
-    "cisco_xrd": ("clab", "clab@123"),
-}
+from clab_common import MAX_WORKERS, dump_topology, load_topology, run_containerlab_inspect
 
-# Commands to retrieve running config
-COMMANDS = {
-    "huawei_vrp": "display current-configuration",
-    "cisco_xrd": "show running-config",
+# Per-kind Scrapli platform, default credentials and command to retrieve the running config
+PROFILES = {
+    "huawei_vrp": ("huawei_vrp", "admin", "admin", "display current-configuration"),
+    "cisco_xrd": ("cisco_iosxr", "clab", "clab@123", "show running-config"),
 }
 
-def run_containerlab_inspect():
-    result = subprocess.run(
-        ["containerlab", "inspect"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-    if result.returncode != 0:
-        raise RuntimeError(f"containerlab inspect failed:\n{result.stderr}")
-    return result.stdout
-
-def parse_containerlab_output(output):
-    devices = []
-    lines = output.splitlines()
-    for line in lines:
-        # Match table rows with first two columns filled
-        m = re.match(r"│\s*([^\|]+?)\s*│\s*([^\|]+?)\s*│", line)
-        if m:
-            name = m.group(1).strip()
-            kind = m.group(2).strip()
-            if kind in ("huawei_vrp", "cisco_xrd"):
-                devices.append({"name": name, "kind": kind})
-    return devices
+
+def get_devices(data):
+    """Supported devices (name + kind) from the `containerlab inspect` JSON."""
+    return [
+        {"name": n["name"], "kind": n["kind"]}
+        for lab in data.values()
+        for n in lab
+        if n.get("kind") in PROFILES
+    ]
 
 
 def scrapli_get_config(host, platform, username, password, command):
@@ -116,73 +101,87 @@ def scrapli_get_config(host, platform, username, password, command):
         "auth_strict_key": False,
         "platform": platform,
     }
-    conn = Scrapli(**device)
-    conn.open()
-    result = conn.send_command(command)
-    conn.close()
-    return result.result
-
-def platform_mapping(kind):
-    if kind == "huawei_vrp":
-        return "huawei_vrp"
-    elif kind == "cisco_xrd":
-        return "cisco_iosxr"
-    else:
-        raise ValueError(f"Unsupported kind: {kind}")
+    # Context manager closes the session even if the command fails
+    with Scrapli(**device) as conn:
+        return conn.send_command(command).result
 
 def update_topology_file(lab_folder, devices):
     yml_file = next(Path(lab_folder).glob("*.clab.yml"))
     backup_file = yml_file.with_suffix(".clab.yml.bak")
-    shutil.copy(yml_file, backup_file)
 
-    with open(yml_file) as f:
-        topology = yaml.safe_load(f)
+    topology = load_topology(yml_file)
 
+    dirty = False
     for dev in devices:
         short_name = dev["short_name"]
         kind = dev["kind"]
         cfg_path = f"./clab-{Path(lab_folder).name}/{short_name}/config/{short_name}.cfg"
         if "startup-config" not in topology["topology"]["nodes"][short_name]:
             topology["topology"]["nodes"][short_name]["startup-config"] = cfg_path
+            dirty = True
 
-    with open(yml_file, "w") as f:
-        yaml.dump(topology, f, sort_keys=False)
+    # Re-runs on an already updated lab: leave the file (and its backup) alone
+    if not dirty:
+        return False
 
-def main():
+    shutil.copy(yml_file, backup_file)
+    dump_topology(yml_file, topology)
+    return True
+
+def handle_device(dev):
+    """Fetch the running config of one device and save it (runs in a worker thread)."""
+    platform, username, password, command = PROFILES[dev["kind"]]
+    try:
+        # dev["name"] is the resolvable container name
+        dev["cfg_file"].write_text(
+            scrapli_get_config(dev["name"], platform, username, password, command)
+        )
+    except Exception as e:
+        return dev, e
+    return dev, None
+
+def main(use_cache=True):
     lab_folder = Path.cwd()
     lab_name = lab_folder.name
 
     print(f"🔍 Inspecting containerlab in {lab_folder}...")
-    output = run_containerlab_inspect()
-    devices = parse_containerlab_output(output)
+    devices = get_devices(run_containerlab_inspect(use_cache))
 
     for dev in devices:
         # Extract short name: remove "clab-<labname>-" prefix
         short_name = dev["name"].replace(f"clab-{lab_name}-", "")
         dev["short_name"] = short_name
 
-        host = dev["name"]  # Resolvable name
-        kind = dev["kind"]
-        platform = platform_mapping(kind)
-        username, password = CREDENTIALS[kind]
-        command = COMMANDS[kind]
-
         cfg_dir = lab_folder / f"clab-{lab_name}" / short_name / "config"
         cfg_dir.mkdir(parents=True, exist_ok=True)
-        cfg_file = cfg_dir / f"{short_name}.cfg"
+        dev["cfg_file"] = cfg_dir / f"{short_name}.cfg"
+
+        print(f"📡 Fetching config from {dev['name']} ({dev['kind']})...")
 
-        print(f"📡 Fetching config from {dev['name']} ({kind})...")
-        try:
-            config_text = scrapli_get_config(host, platform, username, password, command)
-            cfg_file.write_text(config_text)
-            print(f"✅ Saved config to {cfg_file}")
-        except Exception as e:
-            print(f"❌ Failed to get config from {dev['name']}: {e}")
+    # SSH sessions and config file writes run in the workers; results are reported in order
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(devices)))) as executor:
+        for dev, error in executor.map(handle_device, devices):
+            if error is None:
+                print(f"✅ Saved config to {dev['cfg_file']}")
+            else:
+                print(f"❌ Failed to get config from {dev['name']}: {error}")
 
     print("📝 Updating topology file...")
-    update_topology_file(lab_folder, devices)
-    print("✅ Topology file updated and backup created.")
+    if update_topology_file(lab_folder, devices):
+        print("✅ Topology file updated and backup created.")
+    else:
+        print("✅ Topology file already has all startup-config entries.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Save running configs of Containerlab Huawei VRP / Cisco XRd nodes "
+        "and add startup-config entries to the topology file."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run `containerlab inspect` (ignore the cached result).",
+    )
+    args = parser.parse_args()
+    main(use_cache=not args.no_cache)
 
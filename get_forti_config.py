@@ -15,7 +15,8 @@ Overview
 This script:
 1. Runs `containerlab inspect` in the current lab directory.
 2. Identifies FortiGate nodes from the device list.
-3. Connects via SSH (paramiko) using Scrapli.
+3. Connects via SSH (paramiko) using Scrapli (up to `MAX_WORKERS` FortiGates in parallel,
+   see `clab_common.py`).
 4. Executes `show` to retrieve the running config.
 5. Saves the configuration to `clab-<labname>/<node>/config/<node>.cfg`.
 6. Updates the `<labname>.clab.yml` with `startup-config` entries (startup-config not yet implemented for Fortigate in Containerlab)
@@ -26,6 +27,7 @@ Requirements
 - Python 3.8+
 - [Scrapli](https://pypi.org/project/scrapli/)
 - [PyYAML](https://pypi.org/project/PyYAML/)
+- `clab_common.py` (part of clab-tools) in the same directory as this script
 - Containerlab installed and working
 - SSH connectivity to FortiGate nodes
 
@@ -35,60 +37,53 @@ From inside your Containerlab lab directory:
 
     get_fortigate_config.py
 
+`--no-cache` forces a fresh `containerlab inspect` instead of reusing the
+result cached by the clab-tools (see `clab_common.py`).
+
 Author
 ------
 Stephan Baenisch
 """
 
-import subprocess
+import argparse
 import os
-import yaml
+import shutil
 from scrapli import Scrapli
 from scrapli.exceptions import ScrapliException
 from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from clab_common import MAX_WORKERS, dump_topology, load_topology, run_containerlab_inspect
 
 
-def run_containerlab_inspect():
-    """Run `containerlab inspect` and return parsed JSON (dict)."""
-    result = subprocess.run(
-        ["containerlab", "inspect", "--format", "json"],
-        capture_output=True, text=True, check=True
-    )
-    data = yaml.safe_load(result.stdout)
-    return data
 
 
 def get_fortigate_nodes(data: dict):
     """Extract FortiGate nodes from containerlab inspect output."""
-    nodes = []
-    # The top-level key is the lab name
-    lab_name = list(data.keys())[0]
-    for node in data[lab_name]:
-        if "fortigate" in node.get("kind", "").lower():
-            nodes.append(node)
+    # The top-level key is the lab name; keep only FortiGates while walking the list
+    lab_name = next(iter(data))
+    nodes = [node for node in data[lab_name] if "fortigate" in node.get("kind", "").lower()]
     return nodes, lab_name
 
 
 def fetch_fortigate_config(host: str, username: str, password: str) -> str:
     """Connect to FortiGate via SSH and retrieve running config."""
-    conn = Scrapli(
-        host=host,
-        auth_username=username,
-        auth_password=password,
-        auth_strict_key=False,
-        platform="fortinet_fortios",
-        transport="paramiko",
-    )
     try:
-        conn.open()
-        #response = conn.send_command("show full-configuration")
-        response = conn.send_command("show")
-        return response.result
+        with Scrapli(
+            host=host,
+            auth_username=username,
+            auth_password=password,
+            auth_strict_key=False,
+            platform="fortinet_fortios",
+            transport="paramiko",
+        ) as conn:
+            #response = conn.send_command("show full-configuration")
+            response = conn.send_command("show")
+            return response.result
     except ScrapliException as e:
         print(f"❌ Failed to fetch config from {host}: {e}")
         return ""
-    finally:
-        conn.close()
 
 
 def save_config(labname: str, node: str, config: str, max_backups: int = 5):
@@ -104,13 +99,21 @@ def save_config(labname: str, node: str, config: str, max_backups: int = 5):
 
     base_path = os.path.join(config_dir, f"{node}.cfg")
 
-    # Rotate backups
-    for i in range(max_backups, 0, -1):
-        bak_path = f"{base_path}.bak{i}"
-        prev_bak = f"{base_path}.bak{i-1}" if i > 1 else base_path
-        if os.path.exists(prev_bak):
-            os.rename(prev_bak, bak_path)
-            #print(f"🔁 Rotated: {prev_bak} → {bak_path}")
+    # Rotate backups: one directory scan, then rename only the files that exist
+    # (0 = the current config, N = .bakN), highest index first so nothing is clobbered
+    name = f"{node}.cfg"
+    present = []
+    with os.scandir(config_dir) as entries:
+        for entry in entries:
+            if entry.name == name:
+                present.append(0)
+            elif entry.name.startswith(name + ".bak"):
+                idx = entry.name[len(name) + 4:]
+                if idx.isdigit() and not idx.startswith("0") and int(idx) < max_backups:
+                    present.append(int(idx))
+    for i in sorted(present, reverse=True):
+        prev = f"{base_path}.bak{i}" if i else base_path
+        os.rename(prev, f"{base_path}.bak{i + 1}")
 
     # Save new config as the main file
     with open(base_path, "w") as f:
@@ -123,33 +126,51 @@ def save_config(labname: str, node: str, config: str, max_backups: int = 5):
 def backup_topology(topology_file: str):
     """Backup topology file before modification."""
     backup_file = topology_file + f".bak-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    subprocess.run(["cp", topology_file, backup_file], check=True)
+    shutil.copy2(topology_file, backup_file)
     print(f"📦 Backup created: {backup_file}")
 
 
 def update_topology(labname: str, nodes: list, config_map: dict):
     """Update topology file with startup-config entries for FortiGate nodes (with automatic backup)."""
     topology_file = f"{labname}.clab.yml"
-    backup_topology(topology_file)
-
-    with open(topology_file, "r") as f:
-        topo = yaml.safe_load(f)
+    topo = load_topology(Path(topology_file))
 
+    dirty = False
     nodes_section = topo.get("topology", {}).get("nodes", {})
     for nodename, node in nodes_section.items():
         if "fortigate" in node.get("kind", "").lower() and nodename in config_map:
+            if node.get("startup-config") == config_map[nodename]:
+                continue
             node["startup-config"] = config_map[nodename]
+            dirty = True
             print(f"🧩 Added startup-config for {nodename}")
 
-    with open(topology_file, "w") as f:
-        yaml.safe_dump(topo, f, sort_keys=False)
+    if not dirty:
+        print(f"✅ Topology already up to date: {topology_file}")
+        return
+
+    backup_topology(topology_file)
+    dump_topology(Path(topology_file), topo)
 
     print(f"🔄 Topology updated (backup created): {topology_file}")
 
 
-def main():
+def handle_device(node: dict, labname: str):
+    """Fetch and save the config of one FortiGate (runs in a worker thread)."""
+    host = node["ipv4_address"].split("/")[0]
+    name = node["name"]
+    print(f"▶ Fetching config from {name} ({host})...")
+    config = fetch_fortigate_config(
+        host=host,
+        username="admin",  # Default FortiGate username
+        password="admin"   # Default password (adjust as needed)
+    )
+    return name, save_config(labname, name, config) if config else ""
+
+
+def main(use_cache: bool = True):
     """Main execution workflow."""
-    lab_data = run_containerlab_inspect()
+    lab_data = run_containerlab_inspect(use_cache)
     nodes, labname = get_fortigate_nodes(lab_data)
 
     if not nodes:
@@ -160,18 +181,10 @@ def main():
     do_update = input("🧩 Update topology with startup-config entries (a backup will be created)? (y/N): ").strip().lower() == "y"
 
     config_map = {}
-    for node in nodes:
-        host = node["ipv4_address"].split("/")[0]
-        name = node["name"]
-        print(f"▶ Fetching config from {name} ({host})...")
-        config = fetch_fortigate_config(
-            host=host,
-            username="admin",  # Default FortiGate username
-            password="admin"   # Default password (adjust as needed)
-        )
-        if config:
-            path = save_config(labname, name, config)
-            config_map[name] = path
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(nodes))) as executor:
+        for name, path in executor.map(lambda node: handle_device(node, labname), nodes):
+            if path:
+                config_map[name] = path
 
     if config_map and do_update:
         update_topology(labname, nodes, config_map)
@@ -181,5 +194,14 @@ def main():
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    parser = argparse.ArgumentParser(
+        description="Back up FortiGate running configs of the running Containerlab lab."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run `containerlab inspect` (ignore the cached result).",
+    )
+    args = parser.parse_args()
+    raise SystemExit(main(use_cache=not args.no_cache))
 
@@ -7,48 +7,57 @@ Retrieve and save running configuration from FortiGate devices in a Containerlab
 environment using local TFTP backup.
 
 Steps:
-1. Verify TFTP server (tftpd-hpa) is running locally.
+1. Verify TFTP server (tftpd-hpa) is running locally (TFTP read request to
+   TFTP_ADDRESS, `systemctl is-active` only as a fallback).
 2. Parse its configuration for IP and directory.
-3. Use Scrapli to connect to each FortiGate.
+3. Use Scrapli to connect to each FortiGate (up to `MAX_WORKERS` in parallel,
+   see `clab_common.py`).
 4. Execute `execute backup config tftp <hostname>.cfg <tftp_ip>`.
 5. Move resulting file from the TFTP directory to lab node's config directory.
 6. Optionally update the topology file with startup-config entries.
 
+`--no-cache` forces a fresh `containerlab inspect` instead of reusing the
+result cached by the clab-tools (see `clab_common.py`).
+
+If the optional `inotify_simple` package is installed, the script waits for
+tftpd to finish writing each backup instead of polling the TFTP directory.
+
 Author: Stephan Baenisch
 """
 
+import argparse
 import subprocess
 import os
-import yaml
+import re
 import shutil
+import socket
 import time
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from scrapli import Scrapli
 from scrapli.exceptions import ScrapliException
 
+from clab_common import MAX_WORKERS, dump_topology, load_topology, run_containerlab_inspect
+
+# Optional: wake up as soon as tftpd finishes writing instead of polling the directory
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
 
 # ---------------------------------------------------------------------
 # Containerlab & Node Helpers
 # ---------------------------------------------------------------------
 
-def run_containerlab_inspect():
-    """Run `containerlab inspect` and return parsed JSON (dict)."""
-    result = subprocess.run(
-        ["containerlab", "inspect", "--format", "json"],
-        capture_output=True, text=True, check=True
-    )
-    data = yaml.safe_load(result.stdout)
-    return data
-
 
 def get_fortigate_nodes(data: dict):
     """Extract FortiGate nodes from containerlab inspect output."""
-    nodes = []
-    lab_name = list(data.keys())[0]
-    for node in data[lab_name]:
-        if "fortigate" in node.get("kind", "").lower():
-            nodes.append(node)
+    # The top-level key is the lab name; keep only FortiGates while walking the list
+    lab_name = next(iter(data))
+    nodes = [node for node in data[lab_name] if "fortigate" in node.get("kind", "").lower()]
     return nodes, lab_name
 
 
@@ -56,13 +65,15 @@ def get_fortigate_nodes(data: dict):
 # TFTP Server Handling
 # ---------------------------------------------------------------------
 
-def check_tftp_server():
-    """Check if tftpd-hpa is running and parse IP + directory."""
-    try:
-        subprocess.run(["systemctl", "is-active", "--quiet", "tftpd-hpa"], check=True)
-    except subprocess.CalledProcessError:
-        print("❌ TFTP server not active or missing.")
-        print("""
+TFTPD_CONFIG = "/etc/default/tftpd-hpa"
+_TFTPD_CONF_RE = re.compile(
+    r'^[ \t]*(TFTP_ADDRESS|TFTP_DIRECTORY)[ \t]*=[ \t]*"?([^"\n]*)"?', re.MULTILINE
+)
+
+
+TFTP_PROBE_FILE = "clab-tools-probe-does-not-exist"
+
+TFTP_SETUP_HINT = """
 To install and configure minimal TFTP server:
 
 sudo apt install -y tftpd-hpa
@@ -78,19 +89,59 @@ sudo chown -R tftp:tftp /srv/tftp
 sudo chmod -R 755 /srv/tftp
 sudo systemctl restart tftpd-hpa
 sudo systemctl enable tftpd-hpa
-""")
-        return None, None
+"""
 
-    # Parse /etc/default/tftpd-hpa
-    tftp_ip = None
-    tftp_dir = None
-    with open("/etc/default/tftpd-hpa") as f:
-        for line in f:
-            if line.startswith("TFTP_ADDRESS="):
-                val = line.split("=")[1].strip().strip('"')
-                tftp_ip = val.split(":")[0]
-            elif line.startswith("TFTP_DIRECTORY="):
-                tftp_dir = line.split("=")[1].strip().strip('"')
+
+@lru_cache(maxsize=1)
+def read_tftpd_config():
+    """(ip, port, directory) from /etc/default/tftpd-hpa; the file does not change during a run."""
+    try:
+        with open(TFTPD_CONFIG) as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None, 69, None
+    # Last assignment wins, like the shell that sources this file
+    settings = {key: val.strip() for key, val in _TFTPD_CONF_RE.findall(text)}
+    tftp_ip, _, port = settings.get("TFTP_ADDRESS", "").partition(":")
+    return tftp_ip, int(port) if port.isdigit() else 69, settings.get("TFTP_DIRECTORY")
+
+
+def probe_tftp(tftp_ip: str, port: int = 69, timeout: float = 0.5) -> bool:
+    """
+    Check that a TFTP server answers on tftp_ip:port without forking systemctl.
+    A read request for a non-existent file must come back as a TFTP ERROR (or DATA).
+    """
+    target = "127.0.0.1" if tftp_ip == "0.0.0.0" else tftp_ip
+    rrq = b"\x00\x01" + TFTP_PROBE_FILE.encode() + b"\x00octet\x00"
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.sendto(rrq, (target, port))
+            reply, _ = sock.recvfrom(516)
+        except OSError:
+            return False
+    # opcode 3 = DATA, 5 = ERROR
+    return reply[:2] in (b"\x00\x03", b"\x00\x05")
+
+
+def tftpd_service_active() -> bool:
+    """Fallback check via `systemctl is-active tftpd-hpa`."""
+    try:
+        subprocess.run(["systemctl", "is-active", "--quiet", "tftpd-hpa"], check=True)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
+    return True
+
+
+def check_tftp_server():
+    """Check if tftpd-hpa is running and parse IP + directory."""
+    tftp_ip, port, tftp_dir = read_tftpd_config()
+
+    # A TFTP round trip is enough; only ask systemd if nothing answered
+    if not (tftp_ip and probe_tftp(tftp_ip, port)) and not tftpd_service_active():
+        print("❌ TFTP server not active or missing.")
+        print(TFTP_SETUP_HINT)
+        return None, None
 
     if not tftp_ip or not tftp_dir:
         print("⚠️ Could not determine TFTP IP or directory.")
@@ -104,45 +155,104 @@ sudo systemctl enable tftpd-hpa
 # FortiGate Config Retrieval
 # ---------------------------------------------------------------------
 
-def fetch_fortigate_config_tftp(host: str, node_name: str, username: str, password: str,
-                                tftp_ip: str, tftp_dir: Path) -> str:
+def watch_tftp_dir(tftp_dir: Path):
+    """Start an inotify watch on the TFTP directory, or return None to fall back to polling."""
+    if INotify is None:
+        return None
+    try:
+        inotify = INotify()
+        inotify.add_watch(str(tftp_dir), flags.CLOSE_WRITE | flags.MOVED_TO)
+    except OSError:
+        return None
+    return inotify
+
+
+def wait_for_tftp_file(tftp_file: Path, inotify, timeout: float = 10.0) -> bool:
+    """Wait until tftpd has finished writing tftp_file (inotify if available, else poll)."""
+    if inotify is None:
+        for _ in range(int(timeout / 0.5)):
+            if tftp_file.exists():
+                return True
+            time.sleep(0.5)
+        return False
+
+    deadline = time.monotonic() + timeout
+    try:
+        while (remaining := deadline - time.monotonic()) > 0:
+            for event in inotify.read(timeout=int(remaining * 1000)):
+                if event.name == tftp_file.name:
+                    return True
+    finally:
+        inotify.close()
+    return tftp_file.exists()
+
+
+class FortigateSession:
     """
-    Connect to FortiGate and trigger TFTP backup command.
-    Returns the local path of the saved configuration.
+    One SSH session to a FortiGate. Use it as a context manager and run as many
+    commands as needed before it is closed again.
     """
-    tftp_filename = f"{node_name}.cfg"
-    conn = Scrapli(
-        host=host,
-        auth_username=username,
-        auth_password=password,
-        auth_strict_key=False,
-        platform="fortinet_fortios",
-        transport="paramiko",
-    )
-    try:
-        conn.open()
+
+    def __init__(self, host: str, username: str, password: str):
+        self.host = host
+        self.conn = Scrapli(
+            host=host,
+            auth_username=username,
+            auth_password=password,
+            auth_strict_key=False,
+            platform="fortinet_fortios",
+            transport="paramiko",
+        )
+
+    def __enter__(self):
+        self.conn.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.conn.close()
+
+    def backup_tftp(self, node_name: str, tftp_ip: str, tftp_dir: Path) -> str:
+        """Back up the config to the local TFTP server; return the received file path or ""."""
+        tftp_filename = f"{node_name}.cfg"
+        tftp_file = tftp_dir / tftp_filename
+        # Watch before sending the command so a fast upload cannot slip past us
+        inotify = watch_tftp_dir(tftp_dir)
+
         cmd = f"execute backup config tftp {tftp_filename} {tftp_ip}"
         print(f"📡 Sending: {cmd}")
-        response = conn.send_command(cmd)
-        #conn.close()
+        try:
+            response = self.conn.send_command(cmd)
+        except ScrapliException:
+            if inotify is not None:
+                inotify.close()
+            raise
+
         if "OK" not in response.result:
             print(f"⚠️ TFTP backup command did not confirm success for {node_name}")
+            if inotify is not None:
+                inotify.close()
             return ""
 
-        # Wait briefly for file to appear
-        tftp_file = tftp_dir / tftp_filename
-        for _ in range(20):  # wait up to ~10 seconds
-            if tftp_file.exists():
-                return str(tftp_file)
-            time.sleep(0.5)
+        # Wait briefly for the upload to complete
+        if wait_for_tftp_file(tftp_file, inotify):
+            return str(tftp_file)
 
         print(f"❌ No TFTP file received for {node_name}.")
         return ""
+
+
+def fetch_fortigate_config_tftp(host: str, node_name: str, username: str, password: str,
+                                tftp_ip: str, tftp_dir: Path) -> str:
+    """
+    Connect to FortiGate and trigger TFTP backup command.
+    Returns the local path of the saved configuration.
+    """
+    try:
+        with FortigateSession(host, username, password) as session:
+            return session.backup_tftp(node_name, tftp_ip, tftp_dir)
     except ScrapliException as e:
         print(f"❌ Failed to connect to {host}: {e}")
         return ""
-    finally:
-        conn.close()
 
 
 # ---------------------------------------------------------------------
@@ -159,12 +269,21 @@ def save_config(labname: str, node: str, tftp_path: str, max_backups: int = 5):
 
     dest = os.path.join(config_dir, f"{node}.cfg")
 
-    # Rotate existing backups
-    for i in range(max_backups, 0, -1):
-        bak = f"{dest}.bak{i}"
-        prev = f"{dest}.bak{i-1}" if i > 1 else dest
-        if os.path.exists(prev):
-            os.rename(prev, bak)
+    # Rotate backups: one directory scan, then rename only the files that exist
+    # (0 = the current config, N = .bakN), highest index first so nothing is clobbered
+    name = f"{node}.cfg"
+    present = []
+    with os.scandir(config_dir) as entries:
+        for entry in entries:
+            if entry.name == name:
+                present.append(0)
+            elif entry.name.startswith(name + ".bak"):
+                idx = entry.name[len(name) + 4:]
+                if idx.isdigit() and not idx.startswith("0") and int(idx) < max_backups:
+                    present.append(int(idx))
+    for i in sorted(present, reverse=True):
+        prev = f"{dest}.bak{i}" if i else dest
+        os.rename(prev, f"{dest}.bak{i + 1}")
 
     # Move new config
     if tftp_path and os.path.exists(tftp_path):
@@ -183,26 +302,31 @@ def save_config(labname: str, node: str, tftp_path: str, max_backups: int = 5):
 def backup_topology(topology_file: str):
     """Backup topology file before modification."""
     backup_file = topology_file + f".bak-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    subprocess.run(["cp", topology_file, backup_file], check=True)
+    shutil.copy2(topology_file, backup_file)
     print(f"📦 Backup created: {backup_file}")
 
 
 def update_topology(labname: str, nodes: list, config_map: dict):
     """Update topology file with startup-config entries for FortiGate nodes."""
     topology_file = f"{labname}.clab.yml"
-    backup_topology(topology_file)
-
-    with open(topology_file, "r") as f:
-        topo = yaml.safe_load(f)
+    topo = load_topology(Path(topology_file))
 
+    dirty = False
     nodes_section = topo.get("topology", {}).get("nodes", {})
     for nodename, node in nodes_section.items():
         if "fortigate" in node.get("kind", "").lower() and nodename in config_map:
+            if node.get("startup-config") == config_map[nodename]:
+                continue
             node["startup-config"] = config_map[nodename]
+            dirty = True
             print(f"🧩 Added startup-config for {nodename}")
 
-    with open(topology_file, "w") as f:
-        yaml.safe_dump(topo, f, sort_keys=False)
+    if not dirty:
+        print(f"✅ Topology already up to date: {topology_file}")
+        return
+
+    backup_topology(topology_file)
+    dump_topology(Path(topology_file), topo)
 
     print(f"🔄 Topology updated: {topology_file}")
 
@@ -211,13 +335,30 @@ def update_topology(labname: str, nodes: list, config_map: dict):
 # Main Logic
 # ---------------------------------------------------------------------
 
-def main():
+def handle_device(node: dict, labname: str, tftp_ip: str, tftp_dir: Path):
+    """Back up one FortiGate via TFTP and move the file into the lab (runs in a worker thread)."""
+    host = node["ipv4_address"].split("/")[0]
+    name = node["name"]
+    print(f"▶ Backing up config from {name} ({host}) via TFTP...")
+
+    tftp_file = fetch_fortigate_config_tftp(
+        host=host,
+        node_name=name,
+        username="admin",
+        password="admin",
+        tftp_ip=tftp_ip,
+        tftp_dir=tftp_dir,
+    )
+    return name, save_config(labname, name, tftp_file) if tftp_file else ""
+
+
+def main(use_cache: bool = True):
     """Main execution workflow."""
     tftp_ip, tftp_dir = check_tftp_server()
     if not tftp_ip:
         return 1
 
-    lab_data = run_containerlab_inspect()
+    lab_data = run_containerlab_inspect(use_cache)
     nodes, labname = get_fortigate_nodes(lab_data)
 
     if not nodes:
@@ -227,23 +368,10 @@ def main():
     do_update = input("🧩 Update topology with startup-config entries (y/N): ").strip().lower() == "y"
 
     config_map = {}
-    for node in nodes:
-        host = node["ipv4_address"].split("/")[0]
-        name = node["name"]
-        print(f"▶ Backing up config from {name} ({host}) via TFTP...")
-
-        tftp_file = fetch_fortigate_config_tftp(
-            host=host,
-            node_name=name,
-            username="admin",
-            password="admin",
-            tftp_ip=tftp_ip,
-            tftp_dir=tftp_dir,
-        )
-
-        if tftp_file:
-            path = save_config(labname, name, tftp_file)
-            config_map[name] = path
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(nodes))) as executor:
+        for name, path in executor.map(lambda node: handle_device(node, labname, tftp_ip, tftp_dir), nodes):
+            if path:
+                config_map[name] = path
 
     if config_map and do_update:
         update_topology(labname, nodes, config_map)
@@ -253,5 +381,14 @@ def main():
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    parser = argparse.ArgumentParser(
+        description="Back up FortiGate running configs of the running Containerlab lab via TFTP."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run `containerlab inspect` (ignore the cached result).",
+    )
+    args = parser.parse_args()
+    raise SystemExit(main(use_cache=not args.no_cache))
 
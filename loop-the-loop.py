@@ -40,21 +40,38 @@ From inside your Containerlab lab directory:
 The script will:
 1. Run `containerlab inspect -f json`
 2. Parse all XRd routers
-3. Assign and configure loopback addresses
-4. Commit the configuration
+3. Assign loopback addresses (in inspect order)
+4. Configure and commit them on up to `MAX_WORKERS` routers in parallel
+
+`--no-cache` forces a fresh `containerlab inspect` instead of reusing the
+result cached by the clab-tools. SSH logins to the routers are reused by
+clab-tools run back to back (OpenSSH connection sharing). At most
+`MAX_WORKERS` routers are handled in parallel (`CLAB_TOOLS_WORKERS`). All of
+this is described in `clab_common.py`.
 
 Author
 ------
 Stephan
 """
 
-import json
-import subprocess
+import argparse
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from scrapli import Scrapli
 
+from clab_common import (
+    MAX_WORKERS,
+    SSH_CONTROL_DIR,
+    SSH_MUX_OPTIONS,
+    run_containerlab_inspect,
+    setup_logging,
+)
+
 XR_USERNAME = "clab"
 XR_PASSWORD = "clab@123"
 
+
 # Define IP pools per router type
 POOLS = {
     "crr": {"start": 1, "counter": 0},     # Core Route Reflectors
@@ -66,100 +83,122 @@ POOLS = {
     "other": {"start": 150, "counter": 0}, # Others
 }
 
-def run_containerlab_inspect():
-    """Run containerlab inspect and return parsed JSON."""
-    result = subprocess.run(
-        ["containerlab", "inspect", "-f", "json"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        check=True,
-    )
-    return json.loads(result.stdout)
+# Fallback mode (no router matches a category): one sequential counter for all
+_fallback_counter = 0
+
+# Router name prefix -> POOLS key; "crr" must be tried before "c"
+_POOL_PREFIX_RE = re.compile(r"(crr|CE|c|d|a|s)")
+
+# Loopback0 addresses by last octet: 1.1.1.<n> and fd00::<n> (n written in decimal,
+# as deployed so far), formatted once instead of per router
+LOOPBACKS = [(f"1.1.1.{octet}", f"fd00::{octet}") for octet in range(256)]
+
+# Loopback0 config pushed to every router (one config session incl. commit)
+_LOOP_TPL = (
+    "interface Loopback0",
+    "ipv4 address {v4} 255.255.255.255",
+    "ipv6 address {v6}/128",
+    "commit",
+)
+
+# Messages from the worker threads (handler set up by setup_logging() in the entry point)
+log = logging.getLogger("loop-the-loop")
 
 def categorize_router(name: str) -> str:
-    """Return pool key for router name."""
-    if name.startswith("crr"):
-        return "crr"
-    elif name.startswith("c"):
-        return "c"
-    elif name.startswith("d"):
-        return "d"
-    elif name.startswith("a"):
-        return "a"
-    elif name.startswith("s"):
-        return "s"
-    elif name.startswith("CE"):
-        return "CE"
-    else:
-        return "other"
+    """Return pool key for router name (the matched prefix is the key itself)."""
+    m = _POOL_PREFIX_RE.match(name)
+    return m.group(1) if m else "other"
 
-def next_ipv4(name: str, fallback: bool) -> str:
-    """Assign next IPv4 address for a given router name."""
+def next_loopback(pool_key: str, fallback: bool) -> tuple:
+    """Assign the next (IPv4, IPv6) Loopback0 address pair from the given pool."""
+    global _fallback_counter
     if fallback:
         # Sequential from 1.1.1.1 for all
-        total = sum(pool["counter"] for pool in POOLS.values())
-        octet = total + 1
-        # Update a global counter in "other"
-        POOLS["other"]["counter"] += 1
-        return f"1.1.1.{octet}"
-
-    pool_key = categorize_router(name)
-    base = POOLS[pool_key]["start"]
-    POOLS[pool_key]["counter"] += 1
-    octet = base + POOLS[pool_key]["counter"] - 1
-    return f"1.1.1.{octet}"
-
-def ipv6_from_ipv4(ipv4: str) -> str:
-    """Encode last octet of IPv4 into IPv6 fd00::/8."""
-    last_octet = int(ipv4.split(".")[-1])
-    return f"fd00::{last_octet}"
+        _fallback_counter += 1
+        octet = _fallback_counter
+    else:
+        base = POOLS[pool_key]["start"]
+        POOLS[pool_key]["counter"] += 1
+        octet = base + POOLS[pool_key]["counter"] - 1
+
+    if octet >= len(LOOPBACKS):
+        raise ValueError(f"No loopback address left in pool {pool_key!r} (octet {octet})")
+    return LOOPBACKS[octet]
 
 def configure_loopback(node: dict, ipv4_host: str, ipv6_host: str):
     """Push loopback config to XRd router."""
     raw_ip = node["ipv4_address"]
-    host = raw_ip.split("/")[0]  # strip CIDR
-    print(f"📡 Configuring {node['name']} ({host}) ...")
+    host = raw_ip.partition("/")[0]  # strip CIDR
+    log.info(f"📡 Configuring {node['name']} ({host}) ...")
 
-    conn = Scrapli(
+    configs = [line.format(v4=ipv4_host, v6=ipv6_host) for line in _LOOP_TPL]
+    with Scrapli(
         host=host,
         auth_username=XR_USERNAME,
         auth_password=XR_PASSWORD,
         platform="cisco_iosxr",
         #transport="paramiko",
+        transport="system",
+        transport_options=SSH_MUX_OPTIONS,
         auth_strict_key=False,
-    )
-    conn.open()
-
-    configs = [
-        "interface Loopback0",
-        f"ipv4 address {ipv4_host} 255.255.255.255",
-        f"ipv6 address {ipv6_host}/128",
+    ) as conn:
+        # One config session incl. commit: a single prompt round trip less per router
+        response = conn.send_configs(configs, stop_on_failed=True)
+
+    if response.failed:
+        log.error(f"❌ Loopback0 config failed on {node['name']}")
+        return
+
+    log.info(f"✅ Configured Loopback0 with {ipv4_host}, {ipv6_host}")
+
+def run(data: dict):
+    """Plan and configure Loopback0 on all XRd routers of the inspected lab (`containerlab inspect` JSON)."""
+    global _fallback_counter
+    SSH_CONTROL_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    # Address plan always starts from the pool bases
+    for pool in POOLS.values():
+        pool["counter"] = 0
+    _fallback_counter = 0
+
+    all_nodes = next(iter(data.values()))
+
+    # Filter XRd routers and categorize each of them in the same pass;
+    # detect if there are any matches for categories
+    categorized = [
+        (n, categorize_router(n["name"])) for n in all_nodes if n["kind"] == "cisco_xrd"
     ]
-    conn.send_configs(configs)
-    #conn.send_command("commit")
-    conn.send_config("commit")
-    conn.close()
-
-    print(f"✅ Configured Loopback0 with {ipv4_host}, {ipv6_host}")
-
-def main():
-    data = run_containerlab_inspect()
-    all_nodes = list(data.values())[0]
-
-    # Filter XRd routers
-    xrd_nodes = [n for n in all_nodes if n["kind"] == "cisco_xrd"]
-
-    # Detect if there are any matches for categories
-    has_matches = any(categorize_router(n["name"]) != "other" for n in xrd_nodes)
-
-    for node in xrd_nodes:
-        ipv4 = next_ipv4(node["name"], fallback=not has_matches)
-        ipv6 = ipv6_from_ipv4(ipv4)
-        configure_loopback(node, ipv4, ipv6)
+    has_matches = any(pool_key != "other" for _, pool_key in categorized)
+
+    # Address plan first, serially and in inspect order (pool counters)
+    plan = []
+    for node, pool_key in categorized:
+        ipv4, ipv6 = next_loopback(pool_key, fallback=not has_matches)
+        plan.append((node, ipv4, ipv6))
+
+    # Then push the configs in parallel
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(configure_loopback, *job): job[0]["name"] for job in plan}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as exc:
+                log.error(f"❌ {futures[future]}: {exc}")
 
     print("\n✅ Done.")
 
+def main(use_cache: bool = True):
+    run(run_containerlab_inspect(use_cache))
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Configure Loopback0 on all Cisco XRd routers of the running Containerlab lab."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run `containerlab inspect` (ignore the cached result).",
+    )
+    args = parser.parse_args()
+    setup_logging()
+    main(use_cache=not args.no_cache)
 
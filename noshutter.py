@@ -10,117 +10,132 @@ Steps
 -----
 1. Run `containerlab inspect -f json`
 2. Parse node names and kinds
-3. For each XRd router:
+3. For each XRd router (up to `MAX_WORKERS` routers in parallel):
    - Log in via SSH (scrapli)
    - Run `show ip int brief`
    - Find all `GigabitEthernet` interfaces
    - Configure `no shutdown` on each
    - enable lldp
-   - Commit and exit
+   - Commit once and exit (a single SSH session per router)
 
 Requirements
 ------------
 - Python 3.8+
 - Scrapli (`pip install scrapli`)
+- `clab_common.py` (part of clab-tools) in the same directory
 - Containerlab installed and working
+
+`--no-cache` forces a fresh `containerlab inspect` instead of reusing the
+result cached by the clab-tools. SSH logins to the routers are reused by
+clab-tools run back to back (OpenSSH connection sharing). At most
+`MAX_WORKERS` routers are handled in parallel (`CLAB_TOOLS_WORKERS`). All of
+this is described in `clab_common.py`.
 """
 
-import json
-import subprocess
+import argparse
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from scrapli import Scrapli
 
+from clab_common import (
+    MAX_WORKERS,
+    SSH_CONTROL_DIR,
+    SSH_MUX_OPTIONS,
+    run_containerlab_inspect,
+    setup_logging,
+)
 
-def run_containerlab_inspect() -> list:
-    """Run `containerlab inspect` and return list of nodes."""
-    result = subprocess.run(
-        ["containerlab", "inspect", "-f", "json"],
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-    data = json.loads(result.stdout)
-    # Take first value (lab name key)
-    return list(data.values())[0]
+# Interface column of `show ip int brief` for GigabitEthernet ports
+_GIG_IF_RE = re.compile(r"^[ \t]*(GigabitEthernet\S+)", re.MULTILINE)
 
 
-def enable_xrd_interfaces(host: str, username: str, password: str):
-    """Login to XRd router, enable GigabitEthernet interfaces, commit, and exit."""
-    conn = Scrapli(
+# Messages from the worker threads (handler set up by setup_logging() in the entry point)
+log = logging.getLogger("noshutter")
+
+
+def configure_device(host: str, username: str, password: str):
+    """Login to XRd router, enable GigabitEthernet interfaces and LLDP, commit once, and exit."""
+    with Scrapli(
         host=host,
         auth_username=username,
         auth_password=password,
         platform="cisco_iosxr",
+        transport="system",
+        transport_options=SSH_MUX_OPTIONS,
         auth_strict_key=False,
-    )
-    conn.open()
-
-    # Show interfaces
-    result = conn.send_command("show ip int brief")
-    gig_ints = []
-    for line in result.result.splitlines():
-        if "GigabitEthernet" in line:
-            iface = line.split()[0]
-            gig_ints.append(iface)
-
-    if not gig_ints:
-        print(f"⚠️ No GigabitEthernet interfaces found on {host}")
-        conn.close()
+    ) as conn:
+        # Show interfaces
+        result = conn.send_command("show ip int brief")
+        gig_ints = _GIG_IF_RE.findall(result.result)
+
+        if not gig_ints:
+            log.warning(f"⚠️ No GigabitEthernet interfaces found on {host}")
+
+        # One config session: no shutdown on all interfaces, LLDP globally, commit
+        config_block = []
+        for iface in gig_ints:
+            config_block += [
+                f"interface {iface}",
+                "no shutdown",
+                f"description {iface} - tbc",
+            ]
+        config_block += ["lldp", "commit"]
+        # A rejected line ends the session before the commit
+        response = conn.send_configs(config_block, stop_on_failed=True)
+
+    if response.failed:
+        log.error(f"❌ Interface/LLDP config failed on {host}, nothing committed")
         return
 
-    # Enter config and apply no shutdown
     for iface in gig_ints:
-        conn.send_configs([
-            f"interface {iface}",
-            "no shutdown",
-            f"description {iface} - tbc"
-            #"no shutdown",
-            #"commit"
-        ])
-        print(f"✅ Enabled {iface} on {host}")
-
-    # Commit
-    conn.send_config("commit")
-    conn.close()
-
-
-def enable_lldp(host: str, username: str, password: str):
-    """Login to XRd router, enable LLDP, commit, and exit."""
-    conn = Scrapli(
-        host=host,
-        auth_username=username,
-        auth_password=password,
-        platform="cisco_iosxr",
-        auth_strict_key=False,
+        log.info(f"✅ Enabled {iface} on {host}")
+    log.info(f"✅ LLDP enabled globally on {host}.")
+
+
+def configure_node(node: dict):
+    """Enable interfaces and LLDP on one XRd router (runs in a worker thread)."""
+    name = node.get("name")
+    kind = node.get("kind")
+    log.info(f"📡 Configuring {name} ({kind})...")
+    configure_device(
+        host=name,
+        username="clab",
+        password="clab@123",
     )
-    conn.open()
-
-    # Enable LLDP globally
-    conn.send_configs(["lldp"])
-    print("✅ LLDP enabled globally.")
-
-    # Commit
-    conn.send_config("commit")
-    conn.close()
-
-
-def main():
-    nodes = run_containerlab_inspect()
-    for node in nodes:
-        name = node.get("name")
-        kind = node.get("kind")
-        if kind == "cisco_xrd":
-            print(f"📡 Configuring {name} ({kind})...")
-            enable_xrd_interfaces(
-                host=name,
-                username="clab",
-                password="clab@123",
-            )
-            print(f"📡 Enabling LLDP {name} ({kind})...")
-            enable_lldp(
-                host=name,
-                username="clab",
-                password="clab@123",
-            )
+
+
+def run(data: dict):
+    """Enable interfaces and LLDP on all XRd routers of the inspected lab (`containerlab inspect` JSON)."""
+    SSH_CONTROL_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    # Take first value (lab name key)
+    nodes = next(iter(data.values()))
+    xrd_nodes = [node for node in nodes if node.get("kind") == "cisco_xrd"]
+    if not xrd_nodes:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(xrd_nodes))) as executor:
+        futures = {executor.submit(configure_node, node): node["name"] for node in xrd_nodes}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as exc:
+                log.error(f"❌ {futures[future]}: {exc}")
+
+
+def main(use_cache: bool = True):
+    run(run_containerlab_inspect(use_cache))
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Enable GigabitEthernet interfaces and LLDP on all Cisco XRd routers of the running Containerlab lab."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run `containerlab inspect` (ignore the cached result).",
+    )
+    args = parser.parse_args()
+    setup_logging()
+    main(use_cache=not args.no_cache)
@@ -9,17 +9,16 @@ What it does
 ------------
 1. Runs `containerlab inspect -f json` in the current directory and discovers lab nodes.
 2. Filters nodes for Cisco XRd devices (kind == "cisco_xrd").
-3. SSHs to each XRd device with Scrapli (username "clab", password "clab@123").
-4. Runs a safe inspection sequence:
-     - `terminal exec prompt no-timestamp`
-     - `show running-config router ospf | include router ospf`
-   to discover configured OSPF process IDs.
+3. SSHs to each XRd device with Scrapli (username "clab", password "clab@123"),
+   up to `MAX_WORKERS` devices in parallel.
+4. Runs `show running-config router ospf` (a single command, empty on routers
+   without OSPF) to discover configured OSPF process IDs.
 5. Presents a per-router summary of discovered OSPF processes to the user.
 6. Asks once whether to remove the detected OSPF processes from all routers.
    If the user confirms, removes them using:
      - `no router ospf <id>` (for each detected id)
      - `commit`
-   then closes the connection.
+   on the SSH session kept open since discovery, then closes it.
 
 Usage
 -----
@@ -32,10 +31,17 @@ Prompts:
     "Remove detected OSPF processes from all routers? (y/N): "
   Answer `y` to perform the removals, anything else to abort.
 
+`--no-cache` forces a fresh `containerlab inspect` instead of reusing the
+result cached by the clab-tools. SSH logins to the routers are reused by
+clab-tools run back to back (OpenSSH connection sharing). At most
+`MAX_WORKERS` routers are handled in parallel (`CLAB_TOOLS_WORKERS`). All of
+this is described in `clab_common.py`.
+
 Requirements
 ------------
 - Python 3.8+
 - scrapli (`pip install scrapli`)
+- `clab_common.py` (part of clab-tools) in the same directory
 - containerlab available on PATH
 - SSH reachability from the host running this script to the containerlab node names/addresses
 
@@ -46,31 +52,40 @@ Stephan
 
 from __future__ import annotations
 
-import json
+import argparse
+import logging
 import re
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 
 from scrapli import Scrapli
 
+from clab_common import (
+    MAX_WORKERS,
+    SSH_CONTROL_DIR,
+    SSH_MUX_OPTIONS,
+    run_containerlab_inspect,
+    setup_logging,
+)
+
 # Credentials for Cisco XRd in Containerlab
 USERNAME = "clab"
 PASSWORD = "clab@123"
 
+
+# "router ospf <id>" lines of the running config (one scan over the whole output)
+_OSPF_PROCESS_RE = re.compile(r"^\s*router ospf (\d+)", re.MULTILINE)
+
+# Open SSH sessions by device IP, shared by discovery and removal (see get_conn)
+_conns: Dict[str, Scrapli] = {}
+
 # Simple on/off debugging
 DEBUG = False
 
-
-def run_containerlab_inspect() -> dict:
-    """Run `containerlab inspect -f json` and return parsed JSON dict."""
-    result = subprocess.run(
-        ["containerlab", "inspect", "-f", "json"],
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-    return json.loads(result.stdout)
+# Messages from the worker threads (handler set up by setup_logging() in the entry point)
+log = logging.getLogger("ospf-wiper")
 
 
 def discover_xrd_nodes(clab_json: dict) -> Dict[str, str]:
@@ -80,7 +95,7 @@ def discover_xrd_nodes(clab_json: dict) -> Dict[str, str]:
     short_name is derived from the node "name" by stripping the leading "clab-<labname>-"
     if present; otherwise uses the raw node name.
     """
-    lab_name = list(clab_json.keys())[0]
+    lab_name = next(iter(clab_json))
     nodes = {}
     for node in clab_json[lab_name]:
         if node.get("kind") != "cisco_xrd":
@@ -89,44 +104,58 @@ def discover_xrd_nodes(clab_json: dict) -> Dict[str, str]:
         prefix = f"clab-{lab_name}-"
         short = raw_name[len(prefix) :] if raw_name.startswith(prefix) else raw_name
         ipv4 = node.get("ipv4_address", "")
-        ip = ipv4.split("/")[0] if ipv4 else None
+        ip = ipv4.partition("/")[0] if ipv4 else None
         if ip:
             nodes[short] = ip
     return nodes
 
 
+def get_conn(ip: str) -> Scrapli:
+    """
+    Open (or reuse) the SSH session to ip. Discovery and removal run on the same
+    session, so every router costs one handshake; main() closes them at the end.
+    Each ip is only ever used by one worker thread at a time.
+    """
+    conn = _conns.get(ip)
+    if conn is None or not conn.isalive():
+        conn = Scrapli(
+            host=ip,
+            auth_username=USERNAME,
+            auth_password=PASSWORD,
+            platform="cisco_iosxr",
+            transport="system",
+            transport_options=SSH_MUX_OPTIONS,
+            auth_strict_key=False,
+        )
+        conn.open()
+        _conns[ip] = conn
+    return conn
+
+
+def close_connections() -> None:
+    """Close all sessions opened by get_conn()."""
+    while _conns:
+        _, conn = _conns.popitem()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
 def gather_ospf_processes(ip: str) -> List[str]:
     """
     Connect to device at ip, run inspection commands and return list of discovered OSPF process IDs as strings.
 
-    Commands executed:
-      - terminal exec prompt no-timestamp
-      - show running-config router ospf | include router ospf
+    Only the OSPF section of the running config is shown: one round-trip, no
+    pipe to the include utility, and next to nothing to transfer on routers
+    without OSPF. The timestamp line never matches _OSPF_PROCESS_RE.
     """
-    conn = Scrapli(
-        host=ip,
-        auth_username=USERNAME,
-        auth_password=PASSWORD,
-        platform="cisco_iosxr",
-        auth_strict_key=False,
-    )
-    conn.open()
-    # avoid timestamps in outputs (makes parsing cleaner)
-    conn.send_command("terminal exec prompt no-timestamp")
-    # collect lines that include "router ospf"
-    result = conn.send_command("show running-config router ospf | include router ospf")
-    output = result.result or ""
+    conn = get_conn(ip)
+    output = conn.send_command("show running-config router ospf").result or ""
     if DEBUG:
-        print(f"[{ip}] raw ospf discovery output:\n{output}")
-    conn.close()
+        log.info(f"[{ip}] raw ospf discovery output:\n{output}")
 
-    pids: List[str] = []
-    for line in output.splitlines():
-        line = line.strip()
-        m = re.match(r"router ospf (\d+)", line)
-        if m:
-            pids.append(m.group(1))
-    return pids
+    return _OSPF_PROCESS_RE.findall(output)
 
 
 def remove_ospf_processes(ip: str, pids: List[str]) -> Tuple[bool, str]:
@@ -137,37 +166,42 @@ def remove_ospf_processes(ip: str, pids: List[str]) -> Tuple[bool, str]:
     if not pids:
         return True, "no processes to remove"
 
-    conn = Scrapli(
-        host=ip,
-        auth_username=USERNAME,
-        auth_password=PASSWORD,
-        platform="cisco_iosxr",
-        auth_strict_key=False,
+    conn = get_conn(ip)
+
+    # enter config mode and issue all removals plus the commit in one batch
+    # (commit *inside config mode*); a rejected line ends the batch before the commit
+    log.info(f"🧹 Removing OSPF {', '.join(pids)} on {ip}...")
+    response = conn.send_configs(
+        [f"no router ospf {pid}" for pid in pids] + ["commit"], stop_on_failed=True
     )
-    conn.open()
+    if response.failed:
+        rejected = next(r for r in response if r.failed)
+        return False, f"rejected '{rejected.channel_input}', nothing committed"
+    return True, f"removed processes: {', '.join(pids)}"
 
-    # enter config mode and issue removals
-    for pid in pids:
-        print(f"🧹 Removing OSPF {pid} on {ip}...")
-        conn.send_config(f"no router ospf {pid}")
 
-    # commit *inside config mode*
-    conn.send_config("commit")
+def try_gather_ospf_processes(name: str, ip: str) -> List[str]:
+    """gather_ospf_processes() for a worker thread: report errors, return [] on failure."""
+    try:
+        return gather_ospf_processes(ip)
+    except Exception as exc:
+        log.warning(f"⚠️ {name} ({ip}): failed to inspect: {exc}")
+        return []
 
-    conn.close()
-    return True, f"removed processes: {', '.join(pids)}"
 
+def try_remove_ospf_processes(ip: str, pids: List[str]) -> Tuple[bool, str]:
+    """remove_ospf_processes() for a worker thread: turn errors into (False, message)."""
+    try:
+        return remove_ospf_processes(ip, pids)
+    except Exception as exc:
+        return False, f"failed: {exc}"
 
 
 
 
-def main() -> None:
-    try:
-        clab = run_containerlab_inspect()
-    except subprocess.CalledProcessError as exc:
-        print(f"❌ Failed to run containerlab inspect: {exc}")
-        sys.exit(1)
 
+def wipe_ospf(clab: dict) -> None:
+    """Discover OSPF processes on all XRd routers of the inspected lab and remove them on request."""
     xrd_nodes = discover_xrd_nodes(clab)
     if not xrd_nodes:
         print("No Cisco XRd nodes found in this lab. Nothing to do.")
@@ -176,13 +210,12 @@ def main() -> None:
     # Gather OSPF processes on each router
     ospf_map: Dict[str, List[str]] = {}
     print("\n🔎 Discovering existing OSPF processes on XRd routers...")
-    for name, ip in xrd_nodes.items():
-        try:
-            pids = gather_ospf_processes(ip)
-        except Exception as exc:
-            print(f"⚠️ {name} ({ip}): failed to inspect: {exc}")
-            pids = []
-        ospf_map[name] = pids
+    workers = min(MAX_WORKERS, len(xrd_nodes))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map() keeps the inventory order for the summary below
+        results = executor.map(try_gather_ospf_processes, xrd_nodes, xrd_nodes.values())
+        for name, pids in zip(xrd_nodes, results):
+            ospf_map[name] = pids
 
     # Present summary to user
     print("\nDetected OSPF processes:")
@@ -206,13 +239,18 @@ def main() -> None:
 
     # Proceed with removal
     print("\n🧹 Removing OSPF processes on all routers (where detected)...")
-    for name, pids in ospf_map.items():
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            try_remove_ospf_processes,
+            (xrd_nodes[name] for name in ospf_map),
+            ospf_map.values(),
+        ))
+
+    for (name, pids), (success, msg) in zip(ospf_map.items(), results):
         ip = xrd_nodes[name]
         if not pids:
             print(f"- {name} ({ip}): nothing to remove")
-            continue
-        success, msg = remove_ospf_processes(ip, pids)
-        if success:
+        elif success:
             print(f"- {name} ({ip}): ✅ {msg}")
         else:
             print(f"- {name} ({ip}): ❌ {msg}")
@@ -220,5 +258,35 @@ def main() -> None:
     print("\n✔️ OSPF removal run complete.")
 
 
+def run(clab: dict) -> None:
+    """wipe_ospf() for an inspected lab (`containerlab inspect` JSON), closing all sessions afterwards."""
+    SSH_CONTROL_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    try:
+        wipe_ospf(clab)
+    finally:
+        # also after an abort at the prompt or an error
+        close_connections()
+
+
+def main(use_cache: bool = True) -> None:
+    try:
+        clab = run_containerlab_inspect(use_cache)
+    except subprocess.CalledProcessError as exc:
+        print(f"❌ Failed to run containerlab inspect: {exc}")
+        sys.exit(1)
+
+    run(clab)
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Remove OSPF processes from all Cisco XRd routers of the running Containerlab lab."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run `containerlab inspect` (ignore the cached result).",
+    )
+    args = parser.parse_args()
+    setup_logging()
+    main(use_cache=not args.no_cache)
@@ -12,6 +12,8 @@ OVERVIEW
 - Loopback0 is configured as passive in all OSPF processes.
 - Enables OSPF on router-to-router links according to predefined rules.
 - Commits configuration and exits.
+- Talks to up to `MAX_WORKERS` routers in parallel (one SSH session each;
+  `CLAB_TOOLS_WORKERS`, see `clab_common.py`).
 
 ROUTER ROLE CLASSIFICATION
 --------------------------
@@ -46,23 +48,20 @@ LOOPBACK0 CONFIGURATION
 
 LINK-TO-OSPF RULES
 ------------------
-All rules assume link endpoints are parsed as (local_node:local_iface, neighbor_node:neighbor_iface):
+All rules assume link endpoints are parsed as (local_node:local_iface, neighbor_node:neighbor_iface).
+Each end is reduced to its link class ("ah", or the first letter c / s / d / a of the
+name) and the (process, area) is looked up in the `_LINK_RULES` table:
 
 1. Core & Service Links
-   - Links between all "c" and "s" routers: process 1, area OSPF_AREA_CORE
-   - Links between ch routers:
-       - If interface ends with 0/0/0/0: process 1, area OSPF_AREA_CORE
-       - Otherwise: process 10, area OSPF_AREA_DISTRIBUTION
+   - Links between all "c" and "s" routers (incl. ch↔ch): process 1, area OSPF_AREA_CORE
    - Links between c and d routers: process 10, area OSPF_AREA_DISTRIBUTION
 
 2. Distribution & Aggregation Links
    - Between all d routers and between d and ah routers: process 10, area OSPF_AREA_DISTRIBUTION
 
 3. Access & Aggregation Links
-   - Between all a routers and between ah and a routers: process 100, area OSPF_AREA_ACCESS
-   - Special case between ahrg and ahrb:
-       - First link: process 10, area 0.0.0.10
-       - Second link: process 100, area OSPF_AREA_ACCESS
+   - Between all a routers, between ah and a routers and between ah routers
+     (incl. ahrg↔ahrb): process 100, area OSPF_AREA_ACCESS
 
 4. CE Links
    - Links involving CE routers are ignored (no OSPF)
@@ -82,69 +81,67 @@ USAGE
     $ ./ospf-wizard.py
 3. Follow prompt if all routers are "other" to force OSPF on all devices.
 
+`--no-cache` forces a fresh `containerlab inspect` instead of reusing the
+result cached by the clab-tools. SSH logins to the routers are reused by
+clab-tools run back to back (OpenSSH connection sharing). Both are described
+in `clab_common.py`.
+
 AUTHOR
 ------
 Stephan
 """
 
-import subprocess
-import json
+import argparse
 import ipaddress
+import logging
 import re
-from scrapli import Scrapli
+from scrapli.driver.core import IOSXRDriver
 import sys
-import time
-import threading
-import itertools
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
+from clab_common import (
+    MAX_WORKERS,
+    SSH_CONTROL_DIR,
+    SSH_MUX_OPTIONS,
+    run_containerlab_inspect,
+    setup_logging,
+)
 
 DEBUG = False  # set to True or False to enable or suppress debug output
 
+# Worker threads log instead of print: one handler, whole lines, no interleaving
+log = logging.getLogger("ospf-wizard")
+
+# Row of `show lldp neighbors`: <neighbor> <local intf> <hold time> <capability> <neighbor intf>
+_LLDP_RE = re.compile(r"^(?P<neighbor>\S+)\s+(?P<local_intf>\S+)\s+\d+\s+\S+\s+(?P<neighbor_intf>\S+)$")
+# First IPv4 address in `show running-config interface Loopback0`
+_LOOPBACK_RE = re.compile(r"ipv4 address (\d+\.\d+\.\d+\.\d+)")
+
+# Open SSH sessions by router IP, shared by preview and apply (see get_conn)
+_conns = {}
+
 # Define Areas to be used per network region
 OSPF_AREA_CORE = "0.0.0.0"
 OSPF_AREA_DISTRIBUTION = "0.0.0.0"
 OSPF_AREA_ACCESS = "0.0.0.0"
 
 
-# ---------------- Containerlab ----------------
-
-def run_containerlab_inspect() -> dict:
-    result = subprocess.run(
-        ["containerlab", "inspect", "-f", "json"],
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-    return json.loads(result.stdout)
+# ---------------- Role classification ----------------
 
+# Name prefix -> role; alternatives are tried left to right, so the two-letter
+# prefixes win over the generic "c"/"s" (core) and "d" ones
+_ROLE_PREFIX_RE = re.compile(r"CE|ch|cc|cr|sa|dh|ds|ah|as|c|s|d")
+_ROLE_BY_PREFIX = {"CE": "ce", "c": "core", "s": "core"}
 
-# ---------------- Role classification ----------------
 
 def get_router_role(name: str) -> str:
-    if name.startswith("CE"):
-        return "ce"
-    if name.startswith("ch"):
-        return "ch"
-    if name.startswith("cc"):
-        return "cc"
-    if name.startswith("cr"):
-        return "cr"
-    if name.startswith("sa"):
-        return "sa"
-    if name.startswith("dh"):
-        return "dh"
-    if name.startswith("ds"):
-        return "ds"
-    if name.startswith("ah"):
-        return "ah"
-    #if name.startswith("ahrb"):
-    #    return "ahrb"
-    if name.startswith("as"):
-        return "as"
-    if name.startswith("c") or name.startswith("s"):
-        return "core"
-    if name.startswith("d"):
-        return "d"
-    return "other"
+    m = _ROLE_PREFIX_RE.match(name)
+    if not m:
+        return "other"
+    prefix = m.group()
+    return _ROLE_BY_PREFIX.get(prefix, prefix)
 
 
 def ospf_processes_for_role(role: str) -> list:
@@ -162,291 +159,154 @@ def ospf_processes_for_role(role: str) -> list:
     return []  # CE and others → no OSPF unless override
 
 
-link_count_tracker = {}
+# Per-process header of every OSPF router: router-id and passive Loopback0
+_OSPF_HEADER_TPL = (
+    "router ospf {pid}",
+    " router-id {rid}",
+    " mpls ldp sync",
+    " area 0.0.0.0",
+    "  network point-to-point",
+    "  interface Loopback0",
+    "   passive enable",
+    "  !",
+)
 
-def link_to_ospf_bak2(endpoints: list) -> tuple[int, str] | None:
-    n1, i1 = endpoints[0].split(":")
-    n2, i2 = endpoints[1].split(":")
 
-    # CE routers never OSPF
-    if n1.startswith("CE") or n2.startswith("CE"):
-        return None
+# Link class of a router name for link_to_ospf: "ah" or the first letter
+# (c, s, d, a); CE and every other name fall through to None
+_LINK_CLASS_RE = re.compile(r"ah|[acds]")
 
-    # Special dual-link case
-    if (("ahrb" in n1 and "ahrg" in n2) or ("ahrb" in n2 and "ahrg" in n1)):
-        pair_key = tuple(sorted([n1, n2]))
-        count = link_count_tracker.get(pair_key, 0)
-        link_count_tracker[pair_key] = count + 1
-        if count == 0:
-            return (10, OSPF_AREA_DISTRIBUTION)
-        else:
-            return (100, OSPF_AREA_ACCESS)
 
-    # Core–Core
-    if (n1[0] in "cs") and (n2[0] in "cs"):
-        return (1, OSPF_AREA_CORE)
+@lru_cache(maxsize=None)  # every router name shows up once per link it is on
+def _link_class(name: str) -> str | None:
+    m = _LINK_CLASS_RE.match(name)
+    return m.group() if m else None
 
-    # ch–ch dual process
-    if n1.startswith("ch") and n2.startswith("ch"):
-        if i1.endswith("0/0/0/0") or i2.endswith("0/0/0/0"):
-            return (1, OSPF_AREA_CORE)
-        else:
-            return (10, OSPF_AREA_DISTRIBUTION)
-
-    # c–d and d–d links
-    if (n1.startswith("c") and n2.startswith("d")) or (n2.startswith("c") and n1.startswith("d")) or (n1.startswith("d") and n2.startswith("d")):
-        return (10, OSPF_AREA_DISTRIBUTION)
-
-    # a–a, ah–a, ah–ah links
-    if (n1.startswith("a") and n2.startswith("a")) or \
-       (n1.startswith("ah") and n2.startswith("a")) or \
-       (n2.startswith("ah") and n1.startswith("a")):
-        return (100, OSPF_AREA_ACCESS)
-
-    if n1.startswith("ah") and n2.startswith("ah"):
-        if i1.endswith("0/0/0/0") or i2.endswith("0/0/0/0"):
-            return (10, OSPF_AREA_DISTRIBUTION)
-        else:
-            return (100, OSPF_AREA_ACCESS)
-
-    return None
 
+# (process, area) per link, keyed on the sorted link classes of both ends;
+# pairs not listed (CE, unknown names, s↔d, a↔d, ...) get no OSPF
+_LINK_RULES = {
+    # core↔core
+    ("c", "c"): (1, OSPF_AREA_CORE),
+    ("c", "s"): (1, OSPF_AREA_CORE),
+    ("s", "s"): (1, OSPF_AREA_CORE),
+    # d↔d, d↔ah and c↔d
+    ("d", "d"): (10, OSPF_AREA_DISTRIBUTION),
+    ("ah", "d"): (10, OSPF_AREA_DISTRIBUTION),
+    ("c", "d"): (10, OSPF_AREA_DISTRIBUTION),
+    # a↔a, ah↔a and ah↔ah
+    ("a", "a"): (100, OSPF_AREA_ACCESS),
+    ("a", "ah"): (100, OSPF_AREA_ACCESS),
+    ("ah", "ah"): (100, OSPF_AREA_ACCESS),
+}
 
 
 def link_to_ospf(endpoints: list) -> tuple | None:
-    n1, i1 = endpoints[0].split(":")
-    n2, i2 = endpoints[1].split(":")
+    n1, _, i1 = endpoints[0].partition(":")
+    n2, _, i2 = endpoints[1].partition(":")
 
     # DEBUG: show which endpoints are analyzed
     if DEBUG:
-        print(f"🔍 Analyzing link endpoints: {n1}:{i1} ↔ {n2}:{i2}")
-
-    if n1.startswith("CE") or n2.startswith("CE"):
-        return None
-
-    # core↔core
-    if (n1[0] in "cs") and (n2[0] in "cs"):
-        return (1, OSPF_AREA_CORE)
-
-    # ch↔ch
-    if n1.startswith("ch") and n2.startswith("ch"):
-        if i1.endswith("0/0/0/0") or i2.endswith("0/0/0/0"):
-            return (1, OSPF_AREA_CORE)
-        else:
-            return (10, OSPF_AREA_DISTRIBUTION)
-
-    # d↔d or d↔ah
-    if (n1.startswith("d") and n2.startswith("d")) or (
-        (n1.startswith("d") and n2.startswith("ah")) or (n2.startswith("d") and n1.startswith("ah"))
-    ):
-        return (10, OSPF_AREA_DISTRIBUTION)
-
-    # a↔a or ah↔a
-    if (n1.startswith("a") and n2.startswith("a")) or (
-        (n1.startswith("ah") and n2.startswith("a")) or (n2.startswith("a") and n1.startswith("ah"))
-    ):
-        return (100, OSPF_AREA_ACCESS)
-
-    # ah↔ah → distribute across OSPF 10 and 100
-    if n1.startswith("ah") and n2.startswith("ah"):
-    #if n1.startswith("ahrg") and n2.startswith("ahrb"):
-        if sorted([i1, i2])[0] in (i1, i2):  # pick consistently
-            return (10, OSPF_AREA_DISTRIBUTION)
-        else:
-            return (100, OSPF_AREA_ACCESS)
-
-    # NEW: c↔d rule
-    if (n1.startswith("c") and n2.startswith("d")) or (n1.startswith("d") and n2.startswith("c")):
-        return (10, OSPF_AREA_DISTRIBUTION)
-
-    return None
-
+        log.info(f"🔍 Analyzing link endpoints: {n1}:{i1} ↔ {n2}:{i2}")
 
-def link_to_ospf_bak(endpoints: list) -> tuple | None:
-    n1, i1 = endpoints[0].split(":")
-    n2, i2 = endpoints[1].split(":")
-
-    if n1.startswith("CE") or n2.startswith("CE"):
+    c1, c2 = _link_class(n1), _link_class(n2)
+    if c1 is None or c2 is None:
         return None
+    return _LINK_RULES.get((c1, c2) if c1 <= c2 else (c2, c1))
 
-    if (n1[0] in "cs") and (n2[0] in "cs"):
-        return (1, OSPF_AREA_CORE)
 
-    if n1.startswith("ch") and n2.startswith("ch"):
-        if i1.endswith("0/0/0/0") or i2.endswith("0/0/0/0"):
-            return (1, OSPF_AREA_CORE)
-        else:
-            return (10, OSPF_AREA_DISTRIBUTION)
-
-    if (n1.startswith("d") and n2.startswith("d")) or (
-        (n1.startswith("d") and n2.startswith("ah"))
-        or (n2.startswith("d") and n1.startswith("ah"))
-    ):
-        return (10, OSPF_AREA_DISTRIBUTION)
-
-    if (n1.startswith("a") and n2.startswith("a")) or (
-        (n1.startswith("ah") and n2.startswith("a"))
-        or (n2.startswith("a") and n1.startswith("ah"))
-    ):
-        return (100, OSPF_AREA_ACCESS)
-
-    if n1.startswith("ah") and n2.startswith("ah"):
-        if i1.endswith("0/0/0/0") or i2.endswith("0/0/0/0"):
-            return (10, OSPF_AREA_DISTRIBUTION)
+def ospf_links(name: str, neighbors: list, force_all: bool = False) -> list:
+    """
+    OSPF allocation of the LLDP links of one router as
+    (local_intf, neighbor, neighbor_intf, pid, area); links without OSPF are left out.
+    Computed once for the preview, the apply phase pushes the same list.
+    """
+    links = []
+    for local_intf, neighbor, neigh_intf in neighbors:
+        if force_all:
+            pid, area = 1, OSPF_AREA_CORE
         else:
-            return (100, OSPF_AREA_ACCESS)
-
-    return None
+            pid_area = link_to_ospf([f"{name}:{local_intf}", f"{neighbor}:{neigh_intf}"])
+            if not pid_area:
+                continue
+            pid, area = pid_area
+        links.append((local_intf, neighbor, neigh_intf, pid, area))
+    return links
 
 
 # ---------------- Scrapli helpers ----------------
 
-def get_loopback_ip(conn) -> str | None:
-    result = conn.send_command("show running-config interface Loopback0")
-    for line in result.result.splitlines():
-        m = re.search(r"ipv4 address (\d+\.\d+\.\d+\.\d+)", line)
-        if m:
-            return m.group(1)
-    return None
-
-
-#def get_lldp_neighbors_bak3(conn, name=None) -> list[tuple[str, str, str]]:
-    """Return list of (local_interface, neighbor_name, neighbor_interface)."""
-    result = conn.send_command("show lldp neighbors")
-    neighbors = []
-    for line in result.result.splitlines():
-        line = line.strip()
-        # Skip empty lines and known headers
-        if not line or line.startswith("Device") or line.startswith("Capability") or line.startswith("Total") or line.startswith("Fri") or line.startswith("Mon") or line.startswith("Tue") or line.startswith("Wed") or line.startswith("Thu") or line.startswith("Oct") or line.startswith("Nov") or line.startswith("Dec") or line.startswith("Jan") or line.startswith("Feb") or line.startswith("Mar") or line.startswith("Apr") or line.startswith("May") or line.startswith("Jun") or line.startswith("Jul") or line.startswith("Aug") or line.startswith("Sep"):
-            continue
-        
-        parts = line.split()
-        if len(parts) >= 5:
-            neighbor = parts[0]
-            local_intf = parts[1]
-            neighbor_intf = parts[-1]
-            neighbors.append((local_intf, neighbor, neighbor_intf))
-            if DEBUG:
-                print(f"Detected LLDP neighbor: {local_intf} → {neighbor} {neighbor_intf}")
-    return neighbors
-
-
-def get_lldp_neighbors(conn, name=None) -> list[tuple[str, str, str]]:
-    """Return list of (local_interface, neighbor_name, neighbor_interface)."""
-    # prevent router from showing time and date in output
-    result = conn.send_command("terminal exec prompt no-timestamp")
-    # get lldp neighbors
-    result = conn.send_command("show lldp neighbors | include GigabitEthernet")
-    neighbors = []
-    pattern = re.compile(
-        r"^(?P<neighbor>\S+)\s+(?P<local_intf>\S+)\s+\d+\s+\S+\s+(?P<neighbor_intf>\S+)$"
-    )
-    for line in result.result.splitlines():
-        m = pattern.match(line.strip())
-        if m:
-            neighbors.append((m.group("local_intf"), m.group("neighbor"), m.group("neighbor_intf")))
-            if DEBUG:
-                print(f"🔍 Parsed LLDP neighbor: {m.group('local_intf')} ↔ {m.group('neighbor')}:{m.group('neighbor_intf')}")
-    return neighbors
-
-
-def get_lldp_neighbors_bak_latest(conn, name=None) -> list[tuple[str, str, str]]:
+def fetch_router_state(conn) -> tuple:
     """
-    Return list of (local_interface, neighbor_name, neighbor_interface)
-    Only valid LLDP neighbor lines are included.
+    Return (loopback0_ipv4 or None, lldp_neighbors) of one router, read with a
+    single send_commands() batch instead of one round trip per command.
     """
-    #result = conn.send_command("show lldp neighbors")
-    result = conn.send_command("show lldp neighbors | include GigabitEthernet")
-    neighbors = []
-    # ccrb1           GigabitEthernet0/0/0/1          120        R               GigabitEthernet0/0/0/2
-    #pattern = re.compile(r"^(\S+)\s+(\S+)\s+(\d+)\s+(\S+)\s+(\S+)$")
-    pattern = re.compile(r"^(?=.*GigabitEthernet)(\S+)\s+(\S+)\s+(\d+)\s+(\S+)\s+(\S+)$")
-    #pattern = re.compile(r"^(\S+)\s+(\S+)\s+\d+\s+\S+\s+(\S+)$")
-
-    for line in result.result.splitlines():
-        # debug
-        #print(f"Parsing line: {line}")  # <-- debug print
-        m = pattern.match(line.strip())
-        if m:
-            neighbor_name = m.group(1)
-            local_intf = m.group(2)
-            neighbor_intf = m.group(3)
-            neighbors.append((local_intf, neighbor_name, neighbor_intf))
-    return neighbors
-
-
-def get_lldp_neighbors_bak2(conn, name: str) -> list[tuple[str, str, str]]:
-    """Return list of (local_interface, neighbor_name, neighbor_interface)."""
-    result = conn.send_command("show lldp neighbors")
-    neighbors = []
-    for line in result.result.splitlines():
-        # Skip headers and footer
-        if line.strip().startswith("Device") or line.strip().startswith("Total"):
-            continue
-        parts = line.split()
-        # LLDP table rows have at least 5 fields: <DeviceID> <LocalIntf> <Hold-time> <Capability> <PortID>
-        if len(parts) >= 5:
-            neighbor = parts[0]
-            local_intf = parts[1]
-            neighbor_intf = parts[-1]
-            neighbors.append((local_intf, neighbor, neighbor_intf))
+    responses = conn.send_commands([
+        # prevent router from showing time and date in output
+        "terminal exec prompt no-timestamp",
+        "show running-config interface Loopback0",
+        "show lldp neighbors | include GigabitEthernet",
+    ])
+    return parse_loopback_ip(responses[1].result), parse_lldp_neighbors(responses[2].result)
+
+
+def parse_loopback_ip(output: str) -> str | None:
+    """IPv4 address from `show running-config interface Loopback0` output."""
+    # The pattern cannot span lines: one search over the whole output
+    m = _LOOPBACK_RE.search(output)
+    return m.group(1) if m else None
+
+
+def parse_lldp_neighbors(output: str) -> list[tuple[str, str, str]]:
+    """Return list of (local_interface, neighbor_name, neighbor_interface) from `show lldp neighbors`."""
+    matches = filter(None, map(_LLDP_RE.match, map(str.strip, output.splitlines())))
+    neighbors = [(m["local_intf"], m["neighbor"], m["neighbor_intf"]) for m in matches]
+    if DEBUG:
+        for local_intf, neighbor, neigh_intf in neighbors:
+            log.info(f"🔍 Parsed LLDP neighbor: {local_intf} ↔ {neighbor}:{neigh_intf}")
     return neighbors
 
 
-def get_lldp_neighbors_bak(conn, name: str) -> list[tuple[str, str, str]]:
-    """Return list of (local_interface, neighbor_name, neighbor_interface)."""
-    result = conn.send_command("show lldp neighbors")
-    neighbors = []
-    for line in result.result.splitlines():
-        if line.strip().startswith("Device") or line.strip().startswith("Total"):
-            continue
-        parts = line.split()
-        if len(parts) >= 5:
-            neighbor = parts[0]
-            local_intf = parts[1]
-            neighbor_intf = parts[-1]
-            neighbors.append((local_intf, neighbor, neighbor_intf))
-    return neighbors
+def add_link_areas(cfg_lines: list, areas: dict):
+    """Append the `area` blocks with their link interfaces for one OSPF process."""
+    for area, intfs in areas.items():
+        cfg_lines.append(f" area {area}")
+        cfg_lines.extend(f"  interface {intf}" for intf in intfs)
+        cfg_lines.append(" !")
 
 
-def configure_ospf(conn, name: str, role: str, router_id: str, neighbors: list, force_all: bool = False):
+def configure_ospf(conn, name: str, role: str, router_id: str, links: list, force_all: bool = False):
     if force_all:
         processes = [1]
     else:
         processes = ospf_processes_for_role(role)
 
     if not processes:
-        print(f"🚫 Skipping {name} (role {role}, no OSPF).")
+        log.info(f"🚫 Skipping {name} (role {role}, no OSPF).")
         return
 
+    # Link interfaces grouped per process and area
+    by_proc = defaultdict(lambda: defaultdict(list))
+    for local_intf, _, _, pid, area in links:
+        by_proc[pid][area].append(local_intf)
+
+    # Each `router ospf <pid>` is entered once: the process header is followed
+    # directly by its link areas (processes only reached via links come last)
     cfg_lines = []
     for pid in processes:
+        cfg_lines.extend(line.format(pid=pid, rid=router_id) for line in _OSPF_HEADER_TPL)
+        add_link_areas(cfg_lines, by_proc.pop(pid, {}))
+    for pid, areas in by_proc.items():
         cfg_lines.append(f"router ospf {pid}")
-        cfg_lines.append(f" router-id {router_id}")
-        cfg_lines.append(" mpls ldp sync")
-        cfg_lines.append(" area 0.0.0.0")
-        cfg_lines.append("  network point-to-point")
-        cfg_lines.append("  interface Loopback0")
-        cfg_lines.append("   passive enable")
-        cfg_lines.append("  !")
+        add_link_areas(cfg_lines, areas)
 
-    for local_intf, neighbor, neigh_intf in neighbors:
-        if force_all:
-            pid, area = 1, OSPF_AREA_CORE
-        else:
-            pid_area = link_to_ospf([f"{name}:{local_intf}", f"{neighbor}:{neigh_intf}"])
-            if not pid_area:
-                continue
-            pid, area = pid_area
-
-        cfg_lines.append(f"router ospf {pid}")
-        cfg_lines.append(f" area {area}")
-        cfg_lines.append(f"  interface {local_intf}")
-        cfg_lines.append(" !")
-
-    conn.send_configs(cfg_lines)
-    conn.send_config("commit")
-    print(f"✅ Configured OSPF on {name} (RID={router_id})")
+    # One config session incl. commit; stop_on_failed: a rejected line ends the
+    # session before the commit, so nothing is applied on that router
+    response = conn.send_configs(cfg_lines + ["commit"], stop_on_failed=True)
+    if response.failed:
+        log.error(f"❌ OSPF config failed on {name}")
+        return
+    log.info(f"✅ Configured OSPF on {name} (RID={router_id})")
 
 
 def welcome_screen():
@@ -465,42 +325,93 @@ def welcome_screen():
     print("This tool helps you configure OSPF on your Containerlab XRd routers.\n")
 
 
-# Spinner helper
-class Spinner:
-    def __init__(self, message="Working..."):
-        self.spinner = itertools.cycle(["|", "/", "-", "\\"])
-        self.stop_running = False
-        self.thread = None
-        self.message = message
-
-    def start(self):
-        def run():
-            sys.stdout.write(self.message + " ")
-            sys.stdout.flush()
-            while not self.stop_running:
-                sys.stdout.write(next(self.spinner))
-                sys.stdout.flush()
-                time.sleep(0.1)
-                sys.stdout.write("\b")
-        self.thread = threading.Thread(target=run)
-        self.thread.start()
-
-    def stop(self):
-        self.stop_running = True
-        if self.thread:
-            self.thread.join()
-        #sys.stdout.write("\b Done!\n")
+def map_with_progress(fn, items: list, label: str, workers: int) -> list:
+    """
+    executor.map() over items that keeps a live `label done/total` counter on
+    one console line. Only the main thread writes it, once per finished router.
+    """
+    total = len(items)
+    done = 0
+
+    def show(suffix=""):
+        sys.stdout.write(f"\r{label} {done}/{total}{suffix}")
         sys.stdout.flush()
 
+    show()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(fn, item) for item in items]
+        try:
+            for _ in as_completed(futures):
+                done += 1
+                show()
+        finally:
+            show(" Done!\n" if done == total else "\n")
+        return [future.result() for future in futures]
+
+
+# ---------------- Per-router workers ----------------
+
+def get_conn(host: str) -> IOSXRDriver:
+    """
+    Open (or reuse) the SSH session to host. Preview and apply run on the same
+    session, so every router costs one handshake; main() closes them at the end.
+    A session that died while waiting for the confirmation is reopened.
+    """
+    conn = _conns.get(host)
+    if conn is None or not conn.isalive():
+        # IOS-XR driver class directly, no platform-name lookup per session
+        conn = IOSXRDriver(
+            host=host,
+            auth_username="clab",
+            auth_password="clab@123",
+            transport="system",
+            transport_options=SSH_MUX_OPTIONS,
+            auth_strict_key=False,
+        )
+        conn.open()
+        _conns[host] = conn
+    return conn
+
+
+def close_connections():
+    """Close all sessions opened by get_conn()."""
+    while _conns:
+        _, conn = _conns.popitem()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def collect_router(router: tuple) -> tuple:
+    """Router ID and LLDP neighbors of one router (runs in a worker thread)."""
+    name, role, host = router
+    rid, neighbors = fetch_router_state(get_conn(host))
+    return rid or "1.1.1.1", neighbors
+
+
+def apply_router(router: tuple, info: dict, force_all: bool):
+    """Push the previewed OSPF config (router ID and links) of one router (runs in a worker thread)."""
+    name, role, host = router
+    log.info(f"📡 Configuring {name} ({host}) ...")
+    configure_ospf(get_conn(host), name, role, info["rid"], info["links"], force_all=force_all)
+
 
 # ---------------- Main ----------------
 
-def main():
+def main(use_cache: bool = True):
+    SSH_CONTROL_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    try:
+        run_wizard(use_cache)
+    finally:
+        close_connections()
+
 
+def run_wizard(use_cache: bool = True):
     welcome_screen()  # Show welcome at start
 
-    data = run_containerlab_inspect()
-    lab_name = list(data.keys())[0]
+    data = run_containerlab_inspect(use_cache)
+    lab_name = next(iter(data))
 
     # --- Ask upfront which mode to run ---
     print("Select OSPF configuration mode:")
@@ -513,18 +424,16 @@ def main():
     if mode == "b":
         enforce_fallback = True
 
-    roles = []
-    routers = []
-    for node in data[lab_name]:
-        if node["kind"] != "cisco_xrd":
-            continue
-        name = node["name"].replace(f"clab-{lab_name}-", "")
-        role = get_router_role(name)
-        roles.append(role)
-        routers.append((name, role, node["ipv4_address"].split("/")[0]))
+    # (name, role, mgmt IP) of every XRd router, in inspect order
+    prefix = f"clab-{lab_name}-"
+    routers = [
+        (name := node["name"].removeprefix(prefix), get_router_role(name), node["ipv4_address"].partition("/")[0])
+        for node in data[lab_name]
+        if node["kind"] == "cisco_xrd"
+    ]
 
     # --- Auto fallback if roles are unknown and user picked mode a ---
-    if not enforce_fallback and all(r == "other" for r in roles):
+    if not enforce_fallback and all(role == "other" for _, role, _ in routers):
         answer = input("⚠️ No known router types found. Configure OSPF process 1/area 0 on all routers and links? (y/N): ").strip().lower()
         if answer == "y":
             force_all = True
@@ -533,46 +442,26 @@ def main():
     print("\n🔎 Planned OSPF allocations:")
     preview = {}
 
-    spinner = Spinner(" Collecting router info")
-    spinner.start()
-
-    for name, role, host in routers:
-        conn = Scrapli(
-            host=host,
-            auth_username="clab",
-            auth_password="clab@123",
-            platform="cisco_iosxr",
-            auth_strict_key=False,
-        )
-        conn.open()
-        rid = get_loopback_ip(conn) or "1.1.1.1"
-        neighbors = get_lldp_neighbors(conn, name)
-        conn.close()
+    # SSH sessions in parallel, preview built here in inspect order
+    workers = max(1, min(MAX_WORKERS, len(routers)))
+    collected = map_with_progress(collect_router, routers, " Collecting router info", workers)
 
+    for (name, role, host), (rid, neighbors) in zip(routers, collected):
         # Decide processes
         if enforce_fallback or force_all:
             processes = [1]
         else:
             processes = ospf_processes_for_role(role)
 
-        preview[name] = {"host": host, "role": role, "rid": rid, "processes": processes, "neighbors": []}
+        # Assign links (once; the apply phase reuses this allocation)
+        links = ospf_links(name, neighbors, force_all=(enforce_fallback or force_all))
+        preview[name] = {"host": host, "role": role, "rid": rid, "processes": processes, "links": links, "neighbors": []}
 
         # Loopback always passive
         preview[name]["neighbors"].append(("Loopback0", "passive in all"))
-
-        # Assign links
-        for local_intf, neigh, neigh_intf in neighbors:
-            if enforce_fallback or force_all:
-                pid, area = 1, OSPF_AREA_CORE
-            else:
-                pid_area = link_to_ospf([f"{name}:{local_intf}", f"{neigh}:{neigh_intf}"])
-                if not pid_area:
-                    continue
-                pid, area = pid_area
+        for local_intf, neigh, neigh_intf, pid, area in links:
             preview[name]["neighbors"].append((local_intf, f"OSPF {pid} area {area} → {neigh} {neigh_intf}"))
 
-    spinner.stop()
-
     for name, info in preview.items():
         print(f"- {name} ({info['host']}) role={info['role']} RID={info['rid']} → processes {info['processes']}")
         for intf, desc in info["neighbors"]:
@@ -584,112 +473,24 @@ def main():
         return
 
     # --- Apply configs ---
-    for name, role, host in routers:
-        conn = Scrapli(
-            host=host,
-            auth_username="clab",
-            auth_password="clab@123",
-            platform="cisco_iosxr",
-            auth_strict_key=False,
-        )
-        conn.open()
-        rid = get_loopback_ip(conn) or "1.1.1.1"
-        neighbors = get_lldp_neighbors(conn, name)
-        print(f"📡 Configuring {name} ({host}) ...")
-        configure_ospf(conn, name, role, rid, neighbors, force_all=(enforce_fallback or force_all))
-        conn.close()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Push exactly what was previewed, on the sessions opened for the preview
+        list(executor.map(
+            lambda r: apply_router(r, preview[r[0]], enforce_fallback or force_all), routers
+        ))
 
     print("\n✅ Done.")
 
 
 if __name__ == "__main__":
-    main()
-
-
-
-
-# def main_old():
-#     data = run_containerlab_inspect()
-#     lab_name = list(data.keys())[0]
-
-#     roles = []
-#     routers = []
-#     for node in data[lab_name]:
-#         if node["kind"] != "cisco_xrd":
-#             continue
-#         name = node["name"].replace(f"clab-{lab_name}-", "")
-#         role = get_router_role(name)
-#         roles.append(role)
-#         routers.append((name, role, node["ipv4_address"].split("/")[0]))
-
-#     # Fallback if all routers are "other"
-#     force_all = False
-#     if all(r == "other" for r in roles):
-#         answer = input("⚠️ No known router types found. Configure OSPF process 1/area 0 on all routers and links? (y/N): ").strip().lower()
-#         if answer == "y":
-#             force_all = True
-
-#     # Preview allocations
-#     print("\n🔎 Planned OSPF allocations:")
-#     preview = {}
-#     for name, role, host in routers:
-#         conn = Scrapli(
-#             host=host,
-#             auth_username="clab",
-#             auth_password="clab@123",
-#             platform="cisco_iosxr",
-#             auth_strict_key=False,
-#         )
-#         conn.open()
-#         rid = get_loopback_ip(conn) or "1.1.1.1"
-#         neighbors = get_lldp_neighbors(conn, name)
-#         conn.close()
-
-#         processes = [1] if force_all else ospf_processes_for_role(role)
-#         preview[name] = {"host": host, "role": role, "rid": rid, "processes": processes, "neighbors": []}
-
-#         # Loopback always passive
-#         preview[name]["neighbors"].append(("Loopback0", "passive in all"))
-
-#         for local_intf, neigh, neigh_intf in neighbors:
-#             if force_all:
-#                 pid, area = 1, OSPF_AREA_CORE
-#             else:
-#                 pid_area = link_to_ospf([f"{name}:{local_intf}", f"{neigh}:{neigh_intf}"])
-#                 if not pid_area:
-#                     continue
-#                 pid, area = pid_area
-#             preview[name]["neighbors"].append((local_intf, f"OSPF {pid} area {area} → {neigh} {neigh_intf}"))
-
-#     for name, info in preview.items():
-#         print(f"- {name} ({info['host']}) role={info['role']} RID={info['rid']} → processes {info['processes']}")
-#         for intf, desc in info["neighbors"]:
-#             print(f"   {intf} → {desc}")
-
-#     confirm = input("\nProceed to push these configs to devices? (y/N): ").strip().lower()
-#     if confirm != "y":
-#         print("❌ Aborted.")
-#         return
-
-#     # Apply configs
-#     for name, role, host in routers:
-#         conn = Scrapli(
-#             host=host,
-#             auth_username="clab",
-#             auth_password="clab@123",
-#             platform="cisco_iosxr",
-#             auth_strict_key=False,
-#         )
-#         conn.open()
-#         rid = get_loopback_ip(conn) or "1.1.1.1"
-#         neighbors = get_lldp_neighbors(conn, name)
-#         print(f"📡 Configuring {name} ({host}) ...")
-#         configure_ospf(conn, name, role, rid, neighbors, force_all=force_all)
-#         conn.close()
-
-#     print("\n✅ Done.")
-
-
-# if __name__ == "__main__":
-#     main()
-
+    parser = argparse.ArgumentParser(
+        description="Configure OSPF on all Cisco XRd routers of the running Containerlab lab."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run `containerlab inspect` (ignore the cached result).",
+    )
+    args = parser.parse_args()
+    setup_logging()
+    main(use_cache=not args.no_cache)
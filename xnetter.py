@@ -11,7 +11,7 @@ Behavior:
 - For each link (pair of endpoints) allocate next /31 from 10.0.0.0/24
   and map IPv6 /127 from fc00::/7 by embedding IPv4 into low 32 bits
 - Translate short if names like "Gi0-0-0-1" -> "GigabitEthernet0/0/0/1"
-- Configure interfaces on Cisco XRd devices:
+- Configure interfaces on Cisco XRd devices (up to MAX_WORKERS in parallel, see clab_common.py):
     interface <iface>
       ipv4 address 10.x.x.x 255.255.255.254
       ipv6 address <fc00:...>/127
@@ -21,50 +21,66 @@ Behavior:
 
 Note: This script targets Cisco XRd nodes only. It can be extended for other
 vendors.
+
+`--no-cache` forces a fresh `containerlab inspect` instead of reusing the
+result cached by the clab-tools (see `clab_common.py`).
 """
 
 from pathlib import Path
+import argparse
 import subprocess
-import json
-import yaml
 import ipaddress
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from scrapli import Scrapli
 from scrapli.exceptions import ScrapliException
 import sys
 
+import clab_common
+from clab_common import MAX_WORKERS
+
 # ---------- CONFIG ----------
 IPV4_POOL = ipaddress.ip_network("10.10.10.0/24")
 IPV4_PREFIXLEN = 31
 IPV6_BASE = ipaddress.IPv6Address("fc00::")
 IPV6_PREFIXLEN = 127
 
+# Point-to-point interface config, one block per XRd link end
+_IF_TPL = (
+    "interface {intf}",
+    " description To neighbor {peer} {peer_intf}",
+    " ipv4 address {v4} 255.255.255.254",
+    " ipv6 address {v6}/{plen}",
+    " no shutdown",
+)
+
 XRD_USERNAME = "clab"
 XRD_PASSWORD = "clab@123"
+
 # ----------------------------
 
-def run_containerlab_inspect():
-    """Run containerlab inspect -f json and return parsed JSON."""
+def run_containerlab_inspect(use_cache=True):
+    """clab_common.run_containerlab_inspect(), exiting with a message if containerlab fails."""
     try:
-        r = subprocess.run(
-            ["containerlab", "inspect", "-f", "json"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
+        return clab_common.run_containerlab_inspect(use_cache)
     except subprocess.CalledProcessError as e:
-        print("❌ containerlab inspect failed:", e.stderr or e)
+        print("❌ containerlab inspect failed:", e)
         sys.exit(2)
-    try:
-        data = json.loads(r.stdout)
-    except Exception as e:
+    except ValueError as e:
         print("❌ Failed to parse containerlab inspect JSON:", e)
         sys.exit(2)
-    return data
 
 def find_clab_yaml():
-    """Find a single *.clab.yml file in cwd and return Path."""
-    files = list(Path.cwd().glob("*.clab.yml"))
+    """Return the topology file containerlab uses: $CLAB_LABFILE or the only *.clab.yml / *.clab.yaml in cwd."""
+    path = clab_common.find_topology_file()
+    if path is not None:
+        if not path.is_file():
+            print(f"❌ Topology file {path} (CLAB_LABFILE) not found.")
+            sys.exit(1)
+        return path
+    # Not found: tell none from several
+    files = list(Path.cwd().glob("*.clab.y*ml"))
     if not files:
         print("❌ No .clab.yml file found in current directory.")
         sys.exit(1)
@@ -77,7 +93,7 @@ def find_clab_yaml():
 
 def load_links_from_yaml(yml_path: Path):
     """Load links list from clab YAML. Support several plausible structures."""
-    raw = yaml.safe_load(yml_path.read_text())
+    raw = clab_common.load_topology(yml_path)
     # Prefer top-level "links"
     if isinstance(raw, dict):
         if "links" in raw:
@@ -85,20 +101,25 @@ def load_links_from_yaml(yml_path: Path):
         # some clab topologies have the topology under "topology" key
         if "topology" in raw and isinstance(raw["topology"], dict) and "links" in raw["topology"]:
             return raw["topology"]["links"]
-    # fallback: try to find any 'links' key recursively
+    # fallback: try to find any 'links' key (depth-first in document order,
+    # explicit stack of iterators so deeply nested YAML cannot hit the
+    # recursion limit)
     def find_links(obj):
-        if isinstance(obj, dict):
-            for k, v in obj.items():
-                if k == "links":
+        stack = [iter([(None, obj)])]
+        while stack:
+            item = next(stack[-1], None)
+            if item is None:
+                stack.pop()
+                continue
+            k, v = item
+            if k == "links":
+                if v is not None:
                     return v
-                res = find_links(v)
-                if res is not None:
-                    return res
-        if isinstance(obj, list):
-            for item in obj:
-                res = find_links(item)
-                if res is not None:
-                    return res
+                stack.pop()  # empty links: the rest of this mapping is skipped
+            elif isinstance(v, dict):
+                stack.append(iter(v.items()))
+            elif isinstance(v, list):
+                stack.append((None, x) for x in v)
         return None
     links = find_links(raw)
     if links is None:
@@ -113,16 +134,18 @@ def parse_endpoint(ep):
       - string: "hostname:Gi0-0-0-1"
     Returns tuple (hostname, short_iface)
     """
-    if isinstance(ep, dict):
-        # first key/value
-        for k, v in ep.items():
-            return str(k), str(v)
+    # string form first: it is what containerlab topologies normally use
     if isinstance(ep, str):
-        if ":" in ep:
-            host, iface = ep.split(":", 1)
+        host, sep, iface = ep.partition(":")
+        if sep:
             return host.strip(), iface.strip()
+    elif isinstance(ep, dict) and ep:
+        # first key/value
+        k, v = next(iter(ep.items()))
+        return str(k), str(v)
     raise ValueError(f"Unsupported endpoint format: {ep!r}")
 
+@lru_cache(maxsize=256)  # the same few port names recur on every router
 def short_if_to_real_if(short_if: str) -> str:
     """
     Translate Gi0-0-0-1 -> GigabitEthernet0/0/0/1
@@ -148,20 +171,22 @@ def allocate_ipv4_ipv6_pairs(links_count):
     IPv4 integer inside IPV6_BASE low 32 bits. Returns generator of tuples:
     (ipv4_net (IPv4Network), ipv4_addr_a (IPv4Address), ipv4_addr_b, ipv6_addr_a (IPv6Address), ipv6_addr_b)
     """
-    subnets = IPV4_POOL.subnets(new_prefix=IPV4_PREFIXLEN)
-    for net in subnets:
-        # net is IPv4Network with 2 addresses for /31
-        # get both addresses
-        addrs = list(net.hosts()) if list(net.hosts()) else list(net)
-        # sometimes hosts() for /31 yields both addresses or empty; ensure we take the two addresses
-        if len(addrs) < 2:
-            addrs = list(net)
-        a = addrs[0]
-        b = addrs[1]
+    # Integer arithmetic instead of subnets()/hosts(): a /31 is just two
+    # consecutive addresses (the configs use 255.255.255.254 anyway), so no
+    # per-subnet lists are built
+    base = int(IPV4_POOL.network_address)
+    v6_base = int(IPV6_BASE)
+    for offset in range(0, min(2 * links_count, IPV4_POOL.num_addresses), 2):
+        a = base + offset
+        b = a + 1
         # Map IPv6: embed the IPv4 address integer into low 32 bits of base
-        a_v6 = ipaddress.IPv6Address(int(IPV6_BASE) | int(a))
-        b_v6 = ipaddress.IPv6Address(int(IPV6_BASE) | int(b))
-        yield net, a, b, a_v6, b_v6
+        yield (
+            ipaddress.IPv4Network((a, IPV4_PREFIXLEN)),
+            ipaddress.IPv4Address(a),
+            ipaddress.IPv4Address(b),
+            ipaddress.IPv6Address(v6_base | a),
+            ipaddress.IPv6Address(v6_base | b),
+        )
 
 def build_node_map(clab_json):
     """
@@ -175,7 +200,7 @@ def build_node_map(clab_json):
             ipv4 = n.get("ipv4_address")
             ipaddr = None
             if ipv4:
-                ipaddr = ipv4.split("/")[0]
+                ipaddr = ipv4.partition("/")[0]
             nodes[name] = {
                 "name": name,
                 "kind": n.get("kind"),
@@ -222,9 +247,10 @@ def prepare_link_endpoint_mapping(links, nodes_map):
         pairs.append(((h1, if1), (h2, if2)))
     return pairs
 
-def build_device_config_batches(pairs, nodes_map):
+def build_device_config_batches(pairs, xrd_nodes):
     """
-    For each endpoint pair assign next /31 from pool and prepare per-device config commands.
+    For each endpoint pair assign next /31 from pool and prepare per-device config commands
+    (only for the XRd ends in xrd_nodes; other ends get addresses but no config).
     Returns: device_configs: { nodename: [cmd1, cmd2, ...] }
     and allocation_map: list of dicts describing assignment for reporting
     """
@@ -237,32 +263,17 @@ def build_device_config_batches(pairs, nodes_map):
         a_real_if = short_if_to_real_if(a_short_if)
         b_real_if = short_if_to_real_if(b_short_if)
 
-        # Build XRd config lines for each side
-        # For XR, we'll use interface context commands (send_configs will enter config mode)
-        # Example commands per interface:
-        # interface GigabitEthernet0/0/0/1
-        #  description To neighbor <peername> <peer_iface>
-        #  ipv4 address 10.x.x.x 255.255.255.254
-        #  ipv6 address <addr>/<prefixlen>
-        #  no shutdown
-
-        a_cmds = [
-            f"interface {a_real_if}",
-            f" description To neighbor {b_host} {b_real_if}",
-            f" ipv4 address {a4} 255.255.255.254",
-            f" ipv6 address {a6}/{IPV6_PREFIXLEN}",
-            f" no shutdown",
-        ]
-        b_cmds = [
-            f"interface {b_real_if}",
-            f" description To neighbor {a_host} {a_real_if}",
-            f" ipv4 address {b4} 255.255.255.254",
-            f" ipv6 address {b6}/{IPV6_PREFIXLEN}",
-            f" no shutdown",
-        ]
-        # Append to batches
-        device_configs[a_host].extend(a_cmds)
-        device_configs[b_host].extend(b_cmds)
+        # XRd interface context commands for each side (send_configs enters config mode)
+        if a_host in xrd_nodes:
+            device_configs[a_host].extend(
+                line.format(intf=a_real_if, peer=b_host, peer_intf=b_real_if, v4=a4, v6=a6, plen=IPV6_PREFIXLEN)
+                for line in _IF_TPL
+            )
+        if b_host in xrd_nodes:
+            device_configs[b_host].extend(
+                line.format(intf=b_real_if, peer=a_host, peer_intf=a_real_if, v4=b4, v6=b6, plen=IPV6_PREFIXLEN)
+                for line in _IF_TPL
+            )
 
         alloc.append({
             "link_net": str(net),
@@ -272,53 +283,62 @@ def build_device_config_batches(pairs, nodes_map):
 
     return device_configs, alloc
 
-def push_configs_to_devices(device_configs, nodes_map):
+def push_device(node, host, cmds):
+    """
+    Push the config lines of one device and commit once (runs in a worker thread).
+    Returns the result line to print.
+    """
+    conn = None
+    try:
+        conn = Scrapli(
+            host=host,
+            auth_username=XRD_USERNAME,
+            auth_password=XRD_PASSWORD,
+            platform="cisco_iosxr",
+            auth_strict_key=False,
+            transport="paramiko",
+        )
+        conn.open()
+        # send configs and the single commit as one batch (Scrapli enters config
+        # mode; the commit runs inside that configuration session)
+        response = conn.send_configs(cmds + ["commit"], stop_on_failed=True)
+        if response.failed:
+            return f"❌ Config failed on {node}"
+        return f"✅ Pushed {len(cmds)} config lines to {node}"
+    except ScrapliException as e:
+        return f"❌ Scrapli error for {node}: {e}"
+    except Exception as e:
+        return f"❌ Unexpected error for {node}: {e}"
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+def push_configs_to_devices(device_configs, xrd_nodes):
     """
-    Connect to each device and push configs (for XRd). Commits once per device.
+    Connect to each XRd device and push configs. Commits once per device,
+    up to MAX_WORKERS devices in parallel.
     """
+    jobs = []
     for node, cmds in device_configs.items():
-        info = nodes_map.get(node)
-        if not info:
-            print(f"⚠️ Node {node} missing in nodes_map, skipping")
-            continue
-        if info.get("kind") != "cisco_xrd":
-            print(f"ℹ️ Skipping node {node} of kind {info.get('kind')}")
-            continue
-        host = info.get("ip") or info.get("name")
+        info = xrd_nodes[node]
+        host = info["ip"] or info["name"]
         print(f"📡 Configuring {node} ({host}) ...")
-        try:
-            conn = Scrapli(
-                host=host,
-                auth_username=XRD_USERNAME,
-                auth_password=XRD_PASSWORD,
-                platform="cisco_iosxr",
-                auth_strict_key=False,
-                transport="paramiko",
-            )
-            conn.open()
-            # send configs as a batch (Scrapli will enter config mode)
-            conn.send_configs(cmds)
-            # commit once
-            try:
-                conn.send_config("commit")
-            except Exception:
-                # some XRd images expect "commit" inside configuration session; ensuring it's sent
-                conn.send_command("commit")
-            print(f"✅ Pushed {len(cmds)} config lines to {node}")
-        except ScrapliException as e:
-            print(f"❌ Scrapli error for {node}: {e}")
-        except Exception as e:
-            print(f"❌ Unexpected error for {node}: {e}")
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
-
-def main():
+        jobs.append((node, host, cmds))
+    if not jobs:
+        return
+
+    # SSH sessions run in the workers; results are reported in order
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(jobs))) as executor:
+        for result in executor.map(lambda job: push_device(*job), jobs):
+            print(result)
+
+def main(use_cache=True):
     # 1) containerlab inspect
-    clab_json = run_containerlab_inspect()
+    clab_json = run_containerlab_inspect(use_cache)
     nodes_map = build_node_map(clab_json)
+    xrd_nodes = {name: info for name, info in nodes_map.items() if info["kind"] == "cisco_xrd"}
 
     # 2) find YAML and parse links
     yml_path = find_clab_yaml()
@@ -332,7 +352,10 @@ def main():
         return
 
     # 4) build device config batches and allocation table
-    device_configs, alloc = build_device_config_batches(pairs, nodes_map)
+    # (addresses are allocated for every link, configs are only built for XRd ends)
+    for host in sorted({host for pair in pairs for host, _ in pair} - xrd_nodes.keys()):
+        print(f"ℹ️ Skipping node {host} of kind {nodes_map[host]['kind']}")
+    device_configs, alloc = build_device_config_batches(pairs, xrd_nodes)
 
     # 5) show allocation summary
     print("\n🔢 Allocations:")
@@ -347,9 +370,18 @@ def main():
         print("Aborted by user.")
         return
 
-    push_configs_to_devices(device_configs, nodes_map)
+    push_configs_to_devices(device_configs, xrd_nodes)
     print("\n✅ Done.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Address the links of the current Containerlab topology and configure them on Cisco XRd nodes."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run `containerlab inspect` (ignore the cached result).",
+    )
+    args = parser.parse_args()
+    main(use_cache=not args.no_cache)
 